@@ -4,6 +4,7 @@ import sys
 from PySide6.QtCore import QLocale, QTranslator
 from PySide6.QtWidgets import QApplication
 
+from src import theme
 from src.app import MainViewWindow
 
 if __name__ == '__main__':
@@ -16,6 +17,7 @@ if __name__ == '__main__':
             app.installTranslator(translator)
 
         app.setStyle('Fusion')
+        theme.apply(app)
         screen = MainViewWindow()
         screen.show()
 
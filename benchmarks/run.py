@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+接收、解码、插值热点路径的性能基准
+
+使用虚拟驱动（virtualPCANBasic），不需要适配器，可在无界面的 Linux 上运行：
+  python -m benchmarks.run                          只输出每秒处理数
+  python -m benchmarks.run -o base.json             同时保存结果 JSON，作为之后对比的基准
+  python -m benchmarks.run -o new.json --compare base.json --threshold 0.15
+  python -m benchmarks.run -k decode               只运行名称包含 decode 的项目
+
+每项记录 items（每次运行处理的帧/点数）、多次运行的最小与中位耗时、每秒处理数。
+--compare 时每秒处理数比基准下降超过 threshold 的项目视为退化，退出码为 1。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from src import pCANBasic
+from src import tool
+from src.calibration import CalibrationCurve
+from src.frameBuffer import FRAME_DTYPE
+from src.protocol import write_command
+from src.receivePipeline import ReceivePipeline
+from src.session import CanSession
+from src.virtualPCANBasic import VirtualBus, VirtualPCANBasic, sensor_report_frames
+
+CHANNEL = pCANBasic.PCAN_USBBUS1
+SENSOR_IDS = list(range(1, 33))
+BENCHMARKS = []
+
+
+def benchmark(items):
+    """
+    注册基准：items 为每次运行处理的数量
+
+    setup() 返回每次运行调用的函数，或 (prepare, run)：prepare 在每次运行前调用，不计时
+    """
+    def register(setup):
+        BENCHMARKS.append((setup.__name__, items, setup))
+        return setup
+    return register
+
+
+def measure(func, repeat: int):
+    prepare, func = func if isinstance(func, tuple) else (None, func)
+    times = []
+    for i in range(repeat + 1):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        func()
+        if i:  # 第一次为预热
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def report_frames(count: int):
+    """count 帧 32 个传感器的 AD 值上报帧 FRAME_DTYPE 数组"""
+    frames = np.zeros(count, dtype=FRAME_DTYPE)
+    source = sensor_report_frames(SENSOR_IDS)
+    for i in range(count):
+        can_id, data = next(source)
+        frames[i]["id"] = can_id
+        frames[i]["len"] = len(data)
+        frames[i]["data"][:len(data)] = np.frombuffer(data, dtype=np.uint8)
+        frames[i]["timestamp"] = i * 100
+    return frames
+
+
+def virtual_driver(queue_size=1 << 17):
+    bus = VirtualBus(queue_size=queue_size)
+    drv = VirtualPCANBasic(bus=bus)
+    drv.Initialize(CHANNEL, pCANBasic.PCAN_BAUD_500K)
+    return bus, drv
+
+
+def calibration_curve(points=20):
+    ad_values = [100000 + 2000 * i for i in range(points)]
+    return CalibrationCurve(ad_values, [10 * i for i in range(points)])
+
+
+QUEUE_FRAMES = 32768
+
+
+@benchmark(QUEUE_FRAMES)
+def driver_read():
+    """PCANBasic.Read 逐帧读空队列"""
+    bus, drv = virtual_driver()
+    frames = report_frames(QUEUE_FRAMES)
+
+    def run():
+        while drv.Read(CHANNEL)[0] == pCANBasic.PCAN_ERROR_OK:
+            pass
+    return lambda: bus.inject_frames(frames, CHANNEL), run
+
+
+@benchmark(QUEUE_FRAMES)
+def driver_read_batch():
+    """ReadBatch(256) 读空队列"""
+    bus, drv = virtual_driver()
+    frames = report_frames(QUEUE_FRAMES)
+
+    def run():
+        while drv.ReadBatch(CHANNEL, 256)[1]:
+            pass
+    return lambda: bus.inject_frames(frames, CHANNEL), run
+
+
+@benchmark(QUEUE_FRAMES)
+def read_msg_drain():
+    """readMsg（ReceivePipeline.drain）：读空队列并写入环形缓冲区"""
+    bus, drv = virtual_driver()
+    frames = report_frames(QUEUE_FRAMES)
+    pipeline = ReceivePipeline(drv)
+    return lambda: bus.inject_frames(frames, CHANNEL), lambda: pipeline.drain(CHANNEL)
+
+
+@benchmark(QUEUE_FRAMES)
+def receive_pipeline():
+    """CanSession.poll（ReceivePipeline.drain + deliver）：读空队列、解码、按传感器分发与标定换算"""
+    bus, drv = virtual_driver()
+    frames = report_frames(QUEUE_FRAMES)
+    session = CanSession(drv, CHANNEL)
+    session.sensor_state.default_curve = calibration_curve()
+    return lambda: bus.inject_frames(frames, CHANNEL), session.poll
+
+
+@benchmark(4096)
+def decode_scalar():
+    """tool.py 逐帧解码（原 on_worker_result_callback 的方式）"""
+    frames = report_frames(4096)
+    rows = [(int(f["id"]), f["data"].tolist()) for f in frames]
+
+    def run():
+        for can_id, data in rows:
+            if tool.can_id_check_gression_700(can_id):
+                tool.can_id_remove_gression(can_id)
+                tool.merge_int8_to_int32(data)
+                tool.remove_gression_high_3(data[0], data[1])
+    return run
+
+
+@benchmark(4096)
+def decode_array():
+    """tool.decode_frames 整批解码"""
+    frames = report_frames(4096)
+
+    def run():
+        tool.decode_frames(frames["id"], frames["data"])
+    return run
+
+
+@benchmark(4096)
+def interpolate_scalar():
+    """CalibrationCurve.evaluate 逐个换算（替代 check_data_base）"""
+    curve = calibration_curve()
+    values = np.random.default_rng(0).integers(90000, 150000, 4096).tolist()
+
+    def run():
+        for value in values:
+            curve.evaluate(value)
+    return run
+
+
+@benchmark(4096)
+def interpolate_array():
+    """CalibrationCurve.evaluate_array 整批换算"""
+    curve = calibration_curve()
+    values = np.random.default_rng(0).integers(90000, 150000, 4096)
+    out = np.empty(len(values))
+
+    def run():
+        curve.evaluate_array(values, out)
+    return run
+
+
+@benchmark(4096)
+def send_frame():
+    """指令帧构造与写入（protocol.write_command，界面 write_can_frame 与 CanSession.write 共用）"""
+    _, drv = virtual_driver()
+    data = [0xE1, 1, 2, 3, 4, 5, 6, 7]
+
+    def run():
+        for i in range(4096):
+            write_command(drv, CHANNEL, i & 0x7F, data)
+    return run
+
+
+@benchmark(100)
+def table_model_update():
+    """CustomTableModel.update（100 次，20 个标定点），需要 PySide6"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication, QTableView
+    from src.CustomWidget import CustomTableModel
+    from src.calTable import CalTable
+
+    app = QApplication.instance() or QApplication([])
+    table = CalTable((100000 + i, i) for i in range(20))
+    model = CustomTableModel(["AD", "Value", "Acq"], table)
+    view = QTableView()
+    view.setModel(model)
+
+    def run():
+        for _ in range(100):
+            model.update()
+        app.processEvents()
+    return run
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(pattern=None, repeat=5):
+    results = {}
+    for name, items, setup in BENCHMARKS:
+        if pattern and pattern not in name:
+            continue
+        try:
+            func = setup()
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        times = measure(func, repeat)
+        median = statistics.median(times)
+        results[name] = {"items": items, "repeat": repeat,
+                         "seconds_min": min(times), "seconds_median": median,
+                         "per_second": items / median}
+    return {"meta": {"revision": git_revision(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                     "python": platform.python_version(), "numpy": np.__version__,
+                     "platform": platform.platform()},
+            "results": results}
+
+
+def compare(current, baseline, threshold):
+    """打印与基准的对比，返回退化的项目名称"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if "per_second" not in result or not base or "per_second" not in base:
+            continue
+        ratio = result["per_second"] / base["per_second"]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print("%-22s %14.0f/s  %6.2fx%s" % (name, result["per_second"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", help="save the results JSON to this file")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--compare", help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.pattern, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        return 1 if compare(current, baseline, args.threshold) else 0
+
+    for name, result in current["results"].items():
+        if "per_second" in result:
+            print("%-22s %14.0f/s" % (name, result["per_second"]))
+        else:
+            print("%-22s skipped: %s" % (name, result["skipped"]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
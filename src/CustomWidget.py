@@ -3,19 +3,19 @@ from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
 from PySide6.QtGui import QMouseEvent
 from PySide6.QtWidgets import (QTableView, QStyledItemDelegate, )
 
-from .dataModel import SensorCalParam, SensorCalParamList
+from .calTable import CalTable
 
 
 class CustomTableModel(QAbstractTableModel):
 
-    def __init__(self, header: list, data: SensorCalParamList, parent=None):
+    def __init__(self, header: list, data: CalTable, parent=None):
         super().__init__(parent)
         self._header_label: list = header
-        self._data: SensorCalParamList = data
+        self._data: CalTable = data
 
     def rowCount(self, /, parent=...):
         if hasattr(self, "_data"):
-            return len(self._data.sensorCalParam)
+            return len(self._data)
         return 0
 
     def columnCount(self, index=QModelIndex()):
@@ -25,26 +25,23 @@ class CustomTableModel(QAbstractTableModel):
         if not index.isValid():
             return None
 
-        param: SensorCalParam = self._data.sensorCalParam[index.row()]
-
-
         if (role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.EditRole) and index.column() in (0, 1):
-            if index.column() == 0:
-                return param.adValue
-            elif index.column() == 1:
-                return param.rangeValue
+            return self._data[index.row()][index.column()]
         if role == Qt.ItemDataRole.TextAlignmentRole:
             return Qt.AlignmentFlag.AlignCenter  # 设置内容居中
 
     def setData(self, index, value, /, role=...):
         if not index.isValid():
             return False
-        param = self._data.sensorCalParam[index.row()]
         if role == Qt.ItemDataRole.EditRole:
+            row = index.row()
             if index.column() == 0:
-                param.adValue = value
+                # 修改 adValue 后该行移动到有序位置，行号变化时刷新整个表
+                if self._data.set_ad_value(row, value) != row:
+                    self.update()
+                    return True
             elif index.column() == 1:
-                param.rangeValue = value
+                self._data.set_range_value(row, value)
             self.dataChanged.emit(index, index)
             return True
         return False
@@ -82,7 +79,7 @@ class CustomTableModel(QAbstractTableModel):
 
     def removeRow(self, row, /, parent=QModelIndex()):
         self.beginRemoveRows(parent, row, row)
-        self._data.sensorCalParam.pop(row)
+        self._data.remove(row)
         self.endRemoveRows()
         return True
 
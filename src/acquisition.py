@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+标定点采集
+
+AdStatistics 按 CanId 累计 AD 值的数量、均值、方差、最小值和最大值，每个传感器只保存固定大小的状态。
+接收路径整批累加：先求本批每个传感器的数量、均值和离差平方和，再按 Chan 的并行公式与已有统计合并
+（Welford 的整批形式），不保存样本。只累计正在采集的传感器，没有采集时不增加开销。
+start 给出 limit 时只累计前 limit 个样本，整批到达时多出的部分丢弃，按样本数采集正好结束在 samples 个。
+
+AcquisitionWindow 决定一次采集何时结束：收到 samples 个样本，或经过 duration 秒。
+PlateauDetector 由连续的块统计判断读数是否已稳定，用于压力扫描中自动采集标定点。
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+MAX_SENSORS = 256
+NO_LIMIT = np.iinfo(np.int64).max
+
+
+def batch_rank(can_ids: np.ndarray) -> np.ndarray:
+    """每个元素是本批中该 CanId 的第几次出现（从 0 开始）"""
+    order = np.argsort(can_ids, kind="stable")
+    sorted_ids = can_ids[order]
+    first = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    rank = np.arange(len(can_ids)) - np.repeat(first, np.diff(np.r_[first, len(can_ids)]))
+    result = np.empty_like(rank)
+    result[order] = rank
+    return result
+
+
+class AdStatistics:
+    def __init__(self, max_ids=MAX_SENSORS):
+        self.active = np.zeros(max_ids, dtype=bool)
+        self.count = np.zeros(max_ids, dtype=np.int64)
+        self.mean = np.zeros(max_ids)
+        self.m2 = np.zeros(max_ids)  # 离差平方和
+        self.min = np.zeros(max_ids, dtype=np.int64)
+        self.max = np.zeros(max_ids, dtype=np.int64)
+        self.limit = np.full(max_ids, NO_LIMIT, dtype=np.int64)  # 每个传感器最多累计的样本数
+        self._any_active = False
+        self._any_limit = False
+
+    def start(self, can_id: int, limit: int = None):
+        """清空 can_id 的统计并开始累计，limit 不为空时只累计前 limit 个样本"""
+        self.limit[can_id] = NO_LIMIT if limit is None else limit
+        self._any_limit = bool((self.limit != NO_LIMIT).any())
+        self.count[can_id] = 0
+        self.mean[can_id] = 0.0
+        self.m2[can_id] = 0.0
+        self.min[can_id] = np.iinfo(np.int64).max
+        self.max[can_id] = np.iinfo(np.int64).min
+        self.active[can_id] = True
+        self._any_active = True
+
+    def stop(self, can_id: int):
+        self.active[can_id] = False
+        self.limit[can_id] = NO_LIMIT
+        self._any_active = bool(self.active.any())
+        self._any_limit = bool((self.limit != NO_LIMIT).any())
+
+    def add(self, can_ids, ad_values):
+        """累加一批 AD 值（can_ids 与 ad_values 一一对应），只处理正在采集的传感器"""
+        if not self._any_active or len(can_ids) == 0:
+            return
+        can_ids = np.asarray(can_ids, dtype=np.intp)
+        keep = self.active[can_ids]
+        if not keep.any():
+            return
+        can_ids = can_ids[keep]
+        values = np.asarray(ad_values)[keep]
+        if self._any_limit:
+            keep = batch_rank(can_ids) < self.limit[can_ids] - self.count[can_ids]
+            if not keep.any():
+                return
+            can_ids = can_ids[keep]
+            values = values[keep]
+        as_float = values.astype(np.float64)
+
+        size = len(self.count)
+        batch_count = np.bincount(can_ids, minlength=size)
+        batch_mean = np.bincount(can_ids, weights=as_float, minlength=size) / np.maximum(batch_count, 1)
+        deviation = as_float - batch_mean[can_ids]
+        batch_m2 = np.bincount(can_ids, weights=deviation * deviation, minlength=size)
+
+        ids = np.flatnonzero(batch_count)
+        n_a = self.count[ids].astype(np.float64)
+        n_b = batch_count[ids].astype(np.float64)
+        total = n_a + n_b
+        delta = batch_mean[ids] - self.mean[ids]
+        self.mean[ids] += delta * n_b / total
+        self.m2[ids] += batch_m2[ids] + delta * delta * n_a * n_b / total
+        self.count[ids] += batch_count[ids]
+        np.minimum.at(self.min, can_ids, values)
+        np.maximum.at(self.max, can_ids, values)
+
+    def variance(self, can_id: int) -> float:
+        """样本方差，少于两个样本时为 0"""
+        count = int(self.count[can_id])
+        return float(self.m2[can_id]) / (count - 1) if count > 1 else 0.0
+
+    def summary(self, can_id: int) -> dict:
+        """count、mean、std、min、max，未收到样本时 mean 等为 None"""
+        count = int(self.count[can_id])
+        if count == 0:
+            return {"count": 0, "mean": None, "std": None, "min": None, "max": None}
+        return {"count": count, "mean": float(self.mean[can_id]), "std": math.sqrt(self.variance(can_id)),
+                "min": int(self.min[can_id]), "max": int(self.max[can_id])}
+
+
+class AcquisitionWindow:
+    """
+    一次采集的结束条件
+
+    samples 与 duration 至少给出一个，同时给出时先满足者结束；给出 samples 时只累计前 samples 个样本。
+    只给 samples 时最多等待 timeout 秒（传感器不在线或未上报 AD 值）。
+    """
+    timeout = 5.0
+
+    def __init__(self, can_id: int, samples: int = None, duration: float = None):
+        if samples is None and duration is None:
+            raise ValueError("samples or duration is required")
+        self.can_id = can_id
+        self.samples = samples
+        self.duration = duration
+        self.start_time = None
+
+    def start(self, stats: AdStatistics, now: float):
+        self.start_time = now
+        stats.start(self.can_id, self.samples)
+
+    def finished(self, stats: AdStatistics, now: float) -> bool:
+        elapsed = now - self.start_time
+        if self.samples is not None and stats.count[self.can_id] >= self.samples:
+            return True
+        if self.duration is not None:
+            return elapsed >= self.duration
+        return elapsed >= self.timeout
+
+    def complete(self, stats: AdStatistics) -> bool:
+        """结束时是否达到了要求的样本数（按时长采集时只要求至少一个样本）"""
+        count = int(stats.count[self.can_id])
+        if self.samples is not None and self.duration is None:
+            return count >= self.samples
+        return count > 0
+
+
+class PlateauDetector:
+    """
+    AD 值稳定（平台）检测
+
+    调用方每隔固定时间把 AdStatistics 的块统计（数量、均值、离差平方和）交给 add_block 并重新开始累计，
+    保留最近 blocks 块。对块均值做线性拟合，斜率绝对值不超过 max_slope（AD/秒）
+    且残差标准差不超过 max_noise（AD）时认为读数已稳定。
+    检测到平台后，块均值偏离该平台至少 min_step 才重新检测，同一平台只采集一次。
+    """
+
+    def __init__(self, blocks: int = 5, max_slope: float = 20.0, max_noise: float = 5.0, min_step: float = 100.0):
+        if blocks < 3:
+            raise ValueError("at least 3 blocks are required")
+        self.blocks = deque(maxlen=blocks)  # (时间, 数量, 均值, 离差平方和)
+        self.max_slope = max_slope
+        self.max_noise = max_noise
+        self.min_step = min_step
+        self.last_plateau = None  # 上一个平台的均值
+        self.armed = True
+
+    def reset(self):
+        """丢弃已有的块（传感器中断、丢帧等），已采集的平台保持不变"""
+        self.blocks.clear()
+
+    def add_block(self, now: float, count: int, mean: float, m2: float = 0.0):
+        """
+        加入一块统计，检测到新的平台时返回 {count, mean, std, slope, noise}，否则返回 None
+
+        count 为 0（块内没有收到数据）时清空窗口，重新累计
+        """
+        if count == 0:
+            self.reset()
+            return None
+        self.blocks.append((now, count, mean, m2))
+        if not self.armed:
+            if abs(mean - self.last_plateau) < self.min_step:
+                return None
+            self.armed = True
+        if len(self.blocks) < self.blocks.maxlen:
+            return None
+
+        times, counts, means, m2s = (np.array(column, dtype=np.float64) for column in zip(*self.blocks))
+        times -= times.mean()
+        slope = float(np.dot(times, means - means.mean()) / np.dot(times, times)) if times.any() else 0.0
+        residual = means - means.mean() - slope * times
+        noise = math.sqrt(float(np.dot(residual, residual)) / (len(means) - 2))
+        if abs(slope) > self.max_slope or noise > self.max_noise:
+            return None
+
+        total = counts.sum()
+        grand_mean = float(np.dot(counts, means) / total)
+        m2 = float(m2s.sum() + np.dot(counts, (means - grand_mean) ** 2))
+        self.last_plateau = grand_mean
+        self.armed = False
+        self.reset()
+        return {"count": int(total), "mean": grand_mean, "std": math.sqrt(m2 / (total - 1)) if total > 1 else 0.0,
+                "slope": slope, "noise": noise}
@@ -1,30 +1,31 @@
-import bisect
-import json
 import os
+import time
 
 from PySide6.QtCore import Qt, QModelIndex, QThread, QTimer
-from PySide6.QtGui import QIcon
+from PySide6.QtGui import QIcon, QKeySequence, QShortcut
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                                QPushButton, QLabel, QComboBox, QSpacerItem, QTableView,
-                               QSpinBox, QMessageBox, QCheckBox, QLineEdit, QProgressBar, QFileDialog)
-from enum import IntEnum
+                               QSpinBox, QMessageBox, QCheckBox, QLineEdit, QProgressBar, QFileDialog, QSlider)
 
 from .CustomWidget import CustomTableModel, CustomTableAcqButtonDelegate
-from .dataModel import SensorCalParamList, SensorCalParam
+from .acquisition import AcquisitionWindow, AdStatistics, PlateauDetector
+from .calWriter import CalTableWriter, CalWriteScheduler
+from .calibration import CalibrationCurve
+from .calTable import CalTable
+from .idDiscovery import IdDiscovery
+from .metrics import PipelineMetrics, now_us
+from .protocol import Command, configure_reply_filter, write_command
+from .recorder import FrameRecorder, RecordFormatError
+from .replay import FrameReplay
+from .sensorRegistry import SensorRegistry
+from .updateCoalescer import UpdateCoalescer
 from . import pCANBasic
-from . import tool
+from . import theme
+from .receiveEvent import open_receive_event
+from .receivePipeline import ReceivePipeline
 from .work import ReadCanMsgWork
 
 
-class Command(IntEnum):
-    ID = 0x02
-    Freq = 0x1E
-    Save = 0x1D
-    Reset = 0xD3
-    Switch = 0xE0  # 自定义指令，切换功能（0上报物理值，1上报ad值，2进行校准数据保存）
-    Cal = 0xE1
-
-
 class MainViewWindow(QMainWindow):
     max_spin_edit_id = 254
     max_spin_edit_freq = 500
@@ -42,15 +43,62 @@ class MainViewWindow(QMainWindow):
                            '33,333 kBit/sec': pCANBasic.PCAN_BAUD_33K, '20 kBit/sec': pCANBasic.PCAN_BAUD_20K,
                            '10 kBit/sec': pCANBasic.PCAN_BAUD_10K, '5 kBit/sec': pCANBasic.PCAN_BAUD_5K}
     broadcast_id = 0xFF
+    frame_buffer_capacity = 1 << 16  # 接收环形缓冲区容量（帧）
+    display_refresh_hz = 25  # 实时数值的界面刷新率
+    cal_write_interval = 2  # 标定表写入定时器间隔（毫秒）
+    scan_check_interval = 20  # CanId 扫描结束条件的检查间隔（毫秒）
+    replay_speed_list = {'1x': 1.0, '2x': 2.0, '10x': 10.0, 'Max': 0.0}  # 0 为最快速度
+    replay_slider_steps = 1000  # 回放位置滑块的刻度数
+    # 标定点采集窗口：(样本数, 时长秒)
+    acq_window_list = {'1 sample': (1, None), '32 samples': (32, None), '128 samples': (128, None),
+                       '100 ms': (None, 0.1), '500 ms': (None, 0.5), '1 s': (None, 1.0)}
+    acq_check_interval = 20  # 采集结束条件的检查间隔（毫秒）
+    plateau_block_interval = 100  # 自动采集时每块统计的时长（毫秒）
 
     def __init__(self):
         super().__init__()
         self.table_header_label = [self.tr("AD value"), self.tr("Physical value (10KPa)"), self.tr("Acq AD")]
-        self.sensorCalParamList: SensorCalParamList = SensorCalParamList()
+        self.cal_table = CalTable()  # 标定表，始终按 adValue 升序
+        self.calibration_curve = CalibrationCurve.from_table(self.cal_table)
         self.drv = pCANBasic.PCANBasic()
         self.pCanHandle = pCANBasic.PCAN_NONEBUS
         self.workThread = None
         self.worker = None
+        self.receive_event = None
+        self.display_coalescer = UpdateCoalescer(self.on_display_refresh, self.display_refresh_hz, self)
+        self.metrics = PipelineMetrics()
+        self.pipeline = self.create_receive_pipeline()
+        self.reported_frame_loss = 0  # 已在状态栏提示过的 overruns + frames_lost
+        self.reported_read_status = pCANBasic.PCAN_ERROR_OK  # 已在状态栏提示过的读取状态
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.on_metrics_timer)
+        self.cal_writer = None  # 正在进行的标定表写入（CalWriteScheduler）
+        self.recorder = None  # 正在进行的接收帧记录，接收线程写入
+        self.replay = None  # 正在进行的记录回放（虚拟驱动）
+        self.replay_timer = QTimer(self)
+        self.replay_timer.setInterval(500)
+        self.replay_timer.timeout.connect(self.on_replay_timer)
+        self.cal_write_timer = QTimer(self)
+        self.cal_write_timer.setInterval(self.cal_write_interval)
+        self.cal_write_timer.timeout.connect(self.on_cal_write_timer)
+
+        self.ad_stats = AdStatistics()
+        self.acquisition = None  # 正在进行的标定点采集 (行号, AcquisitionWindow, 开始时的丢帧数)
+        self.acq_timer = QTimer(self)
+        self.acq_timer.setInterval(self.acq_check_interval)
+        self.acq_timer.timeout.connect(self.on_acq_timer)
+        self.plateau = None  # 自动采集 (CanId, PlateauDetector, 待配对的参考值列表, 丢帧数)
+        self.plateau_timer = QTimer(self)
+        self.plateau_timer.setInterval(self.plateau_block_interval)
+        self.plateau_timer.timeout.connect(self.on_plateau_timer)
+
+        self.id_discovery = IdDiscovery()
+        self.sensor_registry = SensorRegistry().load()
+        self.pcan_bitrate = 0
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setInterval(self.scan_check_interval)
+        self.scan_timer.timeout.connect(self.on_scan_can_id)
 
         self.pcan_scan_list = []
         self.is_connect = False  # 是否连接
@@ -78,18 +126,13 @@ class MainViewWindow(QMainWindow):
         self.status_bar_progress.setMaximumHeight(15)
         self.status_bar_progress.setMaximumWidth(150)
 
-        self.status_bar_progress.setStyleSheet("""
-        QProgressBar {
-            border: 1px solid;
-            text-align: center;
-        }
-        
-        QProgressBar::chunk {
-            background-color: #02913a;
-            width: 50px;
-        }
-        """)
         self.status_bar_label = QLabel()
+        self.status_bar_mode_label = QLabel()
+        self.status_bar_metrics_label = QLabel()
+        self.status_bar_metrics_label.setToolTip(self.tr("Ctrl+Shift+M: save pipeline metrics"))
+        self.statusBar().addPermanentWidget(self.status_bar_metrics_label)
+        self.statusBar().addPermanentWidget(self.status_bar_mode_label)
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, self.on_metrics_dump)
         self.statusBar().addPermanentWidget(self.status_bar_label)
         self.statusBar().addPermanentWidget(self.status_bar_progress)
         self.status_bar_progress.hide()
@@ -121,16 +164,7 @@ class MainViewWindow(QMainWindow):
         lay_pcan_scan.addWidget(self.combo_pacn_scan, 6)
 
         self.btn_pcan_scan = QPushButton(self.tr("Refresh"))
-        self.btn_pcan_scan.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #0078D7;
-            border: none;
-            border-radius: 5px;
-            padding: 5px 10px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_pcan_scan, "primary")
         lay_pcan_scan.addWidget(self.btn_pcan_scan, 2)
 
         # 软件设置，波特率选择
@@ -144,21 +178,35 @@ class MainViewWindow(QMainWindow):
         self.combo_pcan_baud.setCurrentIndex(11)
         lay_pcan_baud.addWidget(self.combo_pcan_baud, 8)
 
+        # 软件设置，接收过滤
+        self.check_btn_filter_scanned = QCheckBox(self.tr("Receive scanned IDs only"))
+        lay_pcan_set.addWidget(self.check_btn_filter_scanned)
+
+        # 软件设置，接收帧记录与回放（回放只在虚拟驱动下可用）
+        lay_pcan_record = QHBoxLayout()
+        lay_pcan_set.addLayout(lay_pcan_record)
+        self.btn_record = QPushButton(self.tr("Record"))
+        self.btn_record.setEnabled(False)
+        lay_pcan_record.addWidget(self.btn_record, 3)
+        self.btn_replay = QPushButton(self.tr("Replay"))
+        self.btn_replay.setEnabled(False)
+        lay_pcan_record.addWidget(self.btn_replay, 3)
+        self.combo_replay_speed = QComboBox()
+        self.combo_replay_speed.addItems(list(self.replay_speed_list.keys()))
+        lay_pcan_record.addWidget(self.combo_replay_speed, 2)
+        self.slider_replay_position = QSlider(Qt.Orientation.Horizontal)
+        self.slider_replay_position.setRange(0, self.replay_slider_steps)
+        self.slider_replay_position.setTracking(False)  # 拖动结束后才跳转
+        self.slider_replay_position.setEnabled(False)
+        self.slider_replay_position.setToolTip(self.tr("Replay position"))
+        lay_pcan_record.addWidget(self.slider_replay_position, 4)
+
         # 软件设置，初始化PCAN
         lay_pcan_init = QVBoxLayout()
         lay_pcan_set.addLayout(lay_pcan_init)
 
         self.btn_pcan_init = QPushButton(self.tr("Connect"))
-        self.btn_pcan_init.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #0078D7;
-            border: none;
-            border-radius: 5px;
-            padding: 5px 10px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_pcan_init, "primary")
 
         lay_pcan_init.addSpacerItem(QSpacerItem(0, 50))
         lay_pcan_init.addWidget(self.btn_pcan_init)
@@ -168,11 +216,18 @@ class MainViewWindow(QMainWindow):
         lay_pcan_save_set.addLayout(lay_save_set, 5)
 
         self.btn_cal_save = QPushButton(self.tr("Cal Write"))
+        self.btn_cal_batch_save = QPushButton(self.tr("Batch Cal Write"))
         self.btn_plant_save = QPushButton(self.tr("Plant Save"))
         self.btn_recover_plant = QPushButton(self.tr("Recover Plant"))
         lay_save_set.addWidget(self.btn_cal_save)
+        lay_save_set.addWidget(self.btn_cal_batch_save)
         lay_save_set.addWidget(self.btn_plant_save)
         lay_save_set.addWidget(self.btn_recover_plant)
+        # 传感器固件是否回送 Cal 确认尚未确认，默认按固定间隔写入，不等待确认
+        self.check_btn_cal_ack = QCheckBox(self.tr("Confirm cal points"))
+        self.check_btn_cal_ack.setToolTip(self.tr("Wait for the sensor to echo each Cal frame; "
+                                                  "only for firmware that sends the echo"))
+        lay_save_set.addWidget(self.check_btn_cal_ack)
         if self.is_admin:
             self.check_btn_broadcast = QCheckBox(self.tr("Broadcast writing"))
             lay_save_set.addWidget(self.check_btn_broadcast)
@@ -197,33 +252,35 @@ class MainViewWindow(QMainWindow):
 
         self.btn_sensor_cal_add = QPushButton(self.tr("Add"))
         self.btn_sensor_cal_minus = QPushButton(self.tr("Remove"))
-        self.btn_sensor_cal_sort = QPushButton(self.tr("Sort"))
         self.btn_load_cal = QPushButton(self.tr("Load"))
         self.btn_save_cal = QPushButton(self.tr("Save"))
 
-        self.btn_sensor_cal_sort.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #0078D7;
-            border: none;
-            border-radius: 5px;
-            padding: 5px 10px;
-            font-size: 14px;
-        }
-        ''')
         lay_btn_sensor_cal.addWidget(self.btn_sensor_cal_add, 2)
         lay_btn_sensor_cal.addWidget(self.btn_sensor_cal_minus, 2)
         lay_btn_sensor_cal.addWidget(self.btn_load_cal,1)
         lay_btn_sensor_cal.addWidget(self.btn_save_cal,1)
 
-        lay_btn_sensor_cal.addWidget(self.btn_sensor_cal_sort, 1)
+        self.combo_acq_window = QComboBox()
+        self.combo_acq_window.addItems(list(self.acq_window_list.keys()))
+        self.combo_acq_window.setCurrentText('32 samples')
+        self.combo_acq_window.setToolTip(self.tr("Acquisition averages the AD value over this window"))
+        lay_btn_sensor_cal.addWidget(self.combo_acq_window, 1)
+
+        # 自动采集：读数稳定后自动添加标定点，依次配对参考值
+        lay_auto_cal = QHBoxLayout()
+        lay_sensor_cal.addLayout(lay_auto_cal)
+        self.check_btn_auto_capture = QCheckBox(self.tr("Auto capture"))
+        self.input_reference_values = QLineEdit()
+        self.input_reference_values.setPlaceholderText(self.tr("Reference values, e.g. 0, 100, 200"))
+        lay_auto_cal.addWidget(self.check_btn_auto_capture)
+        lay_auto_cal.addWidget(self.input_reference_values, 1)
 
         self.table_view_sensor_cal = QTableView()
         lay_sensor_cal.addWidget(self.table_view_sensor_cal)
         # self.table_sensor_cal.verticalHeader().setHidden(True)
         # self.table_view_sensor_cal.verticalHeader().setFixedHeight(35)
 
-        self.table_model = CustomTableModel(self.table_header_label, self.sensorCalParamList)
+        self.table_model = CustomTableModel(self.table_header_label, self.cal_table)
         self.table_view_sensor_cal.setModel(self.table_model)
 
         self.table_btn_delegate_acq = CustomTableAcqButtonDelegate()
@@ -244,16 +301,7 @@ class MainViewWindow(QMainWindow):
 
         self.combo_edit_id = QComboBox()
         self.btn_edit_id_scan = QPushButton(self.tr("Scan"))
-        self.btn_edit_id_scan.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #ffa657;
-            border: none;
-            border-radius: 5px;
-            padding: 3px 5px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_edit_id_scan, "read")
 
         self.spin_edit_id = QSpinBox()
         self.spin_edit_id.setMinimum(1)
@@ -264,27 +312,9 @@ class MainViewWindow(QMainWindow):
         lay_edit_id.addWidget(self.spin_edit_id, 2)
 
         self.btn_read_id = QPushButton(self.tr("Read"))
-        self.btn_read_id.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #ffa657;
-            border: none;
-            border-radius: 5px;
-            padding: 3px 5px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_read_id, "read")
         self.btn_edit_id = QPushButton(self.tr("Write"))
-        self.btn_edit_id.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #0078D7;
-            border: none;
-            border-radius: 5px;
-            padding: 3px 5px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_edit_id, "write")
         # lay_edit_id.addWidget(self.btn_read_id, 1)
         lay_edit_id.addWidget(self.btn_edit_id, 1)
 
@@ -303,27 +333,9 @@ class MainViewWindow(QMainWindow):
         lay_edit_freq.addWidget(self.combo_edit_freq, 5)
 
         self.btn_read_freq = QPushButton(self.tr("Read"))
-        self.btn_read_freq.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #ffa657;
-            border: none;
-            border-radius: 5px;
-            padding: 3px 5px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_read_freq, "read")
         self.btn_edit_freq = QPushButton(self.tr("Write"))
-        self.btn_edit_freq.setStyleSheet('''
-        QPushButton {
-            color: white;
-            background-color: #0078D7;
-            border: none;
-            border-radius: 5px;
-            padding: 3px 5px;
-            font-size: 14px;
-        }
-        ''')
+        theme.set_role(self.btn_edit_freq, "write")
         # lay_edit_freq.addWidget(self.btn_read_freq, 1)
         lay_edit_freq.addWidget(self.btn_edit_freq, 1)
 
@@ -335,27 +347,9 @@ class MainViewWindow(QMainWindow):
             self.input_edit_sn = QLineEdit()
             lay_edit_sn.addWidget(self.input_edit_sn, 5)
             self.btn_read_sn = QPushButton(self.tr("Read"))
-            self.btn_read_sn.setStyleSheet('''
-            QPushButton {
-                color: white;
-                background-color: #ffa657;
-                border: none;
-                border-radius: 5px;
-                padding: 3px 5px;
-                font-size: 14px;
-            }
-            ''')
+            theme.set_role(self.btn_read_sn, "read")
             self.btn_edit_sn = QPushButton(self.tr("Write"))
-            self.btn_edit_sn.setStyleSheet('''
-            QPushButton {
-                color: white;
-                background-color: #0078D7;
-                border: none;
-                border-radius: 5px;
-                padding: 3px 5px;
-                font-size: 14px;
-            }
-            ''')
+            theme.set_role(self.btn_edit_sn, "write")
 
             lay_edit_sn.addWidget(self.btn_read_sn, 1)
             lay_edit_sn.addWidget(self.btn_edit_sn, 1)
@@ -372,28 +366,11 @@ class MainViewWindow(QMainWindow):
         lay_read_data.addLayout(lay_read_sensor_ad)
 
         label_read_ad_value = QLabel(self.tr("AD Value"))
-        label_read_ad_value.setStyleSheet('''
-        QLabel {
-            color: #ff8936;
-            font-size: 16px;
-            font-weight: bold;
-        }
-        ''')
+        theme.set_role(label_read_ad_value, "adCaption")
         lay_read_sensor_ad.addWidget(label_read_ad_value)
 
         self.text_read_ad_value = QLabel("00000")
-        self.text_read_ad_value.setStyleSheet('''
-        QLabel {
-            color: white;
-            font-size: 22px;
-            font-weight: 400;
-            background-color: #3A3A3A;
-            border: 2px solid #555;
-            border-radius: 6px;
-            padding: 12px;
-            margin: 5px;
-        }
-        ''')
+        theme.set_role(self.text_read_ad_value, "display")
         self.text_read_ad_value.setAlignment(Qt.AlignmentFlag.AlignRight)
         lay_read_sensor_ad.addWidget(self.text_read_ad_value)
         # lay_read_sensor_ad.addSpacerItem(QSpacerItem(0,25))
@@ -405,29 +382,12 @@ class MainViewWindow(QMainWindow):
         lay_read_data.addLayout(lay_read_sensor_val)
 
         label_read_sensor_value = QLabel(self.tr("Pressure Value (10KPa)"))
-        label_read_sensor_value.setStyleSheet('''
-        QLabel {
-            color: #02913a;
-            font-size: 16px;
-            font-weight: bold;
-        }
-        ''')
+        theme.set_role(label_read_sensor_value, "valueCaption")
         lay_read_sensor_val.addWidget(label_read_sensor_value)
 
         self.text_read_sensor_value = QLabel("00000")
         self.text_read_sensor_value.setAlignment(Qt.AlignmentFlag.AlignRight)
-        self.text_read_sensor_value.setStyleSheet('''
-        QLabel {
-            color: white;
-            font-size: 22px;
-            font-weight: 400;
-            background-color: #3A3A3A;
-            border: 2px solid #555;
-            border-radius: 6px;
-            padding: 12px;
-            margin: 5px;
-        }
-        ''')
+        theme.set_role(self.text_read_sensor_value, "display")
 
         lay_read_sensor_val.addWidget(self.text_read_sensor_value)
 
@@ -439,7 +399,6 @@ class MainViewWindow(QMainWindow):
         self.btn_pcan_init.clicked.connect(self.on_pcan_init_btn_click)
         self.btn_sensor_cal_add.clicked.connect(self.on_sensor_cal_add_btn_click)
         self.btn_sensor_cal_minus.clicked.connect(self.on_sensor_cal_minus_btn_click)
-        self.btn_sensor_cal_sort.clicked.connect(self.on_sensor_cal_sort_btn_click)
         self.btn_load_cal.clicked.connect(self.on_load_btn_click)
         self.btn_save_cal.clicked.connect(self.on_save_btn_click)
 
@@ -450,10 +409,21 @@ class MainViewWindow(QMainWindow):
         self.btn_edit_freq.clicked.connect(self.on_edit_freq_btn_click)
         self.btn_read_freq.clicked.connect(self.on_read_freq_btn_click)
         self.btn_cal_save.clicked.connect(self.on_cal_save_btn_click)
+        self.btn_cal_batch_save.clicked.connect(self.on_cal_batch_save_btn_click)
+        self.btn_record.clicked.connect(self.on_record_btn_click)
+        self.btn_replay.clicked.connect(self.on_replay_btn_click)
+        self.combo_replay_speed.currentTextChanged.connect(self.on_replay_speed_change)
+        self.slider_replay_position.valueChanged.connect(self.on_replay_position_change)
         self.btn_plant_save.clicked.connect(self.on_plant_save_btn_click)
         self.btn_recover_plant.clicked.connect(self.on_recover_plant_btn_click)
         self.table_btn_delegate_acq.clicked.connect(self.on_table_acq_btn_click)
+        self.check_btn_auto_capture.checkStateChanged.connect(self.on_check_box_auto_capture_switch)
+        # 标定表编辑、排序、加载后重建标定曲线
+        self.table_model.dataChanged.connect(self.rebuild_calibration_curve)
+        self.table_model.modelReset.connect(self.rebuild_calibration_curve)
+        self.table_model.rowsRemoved.connect(self.rebuild_calibration_curve)
         self.check_btn_read_sensor_value.checkStateChanged.connect(self.on_check_box_pressure_value_switch)
+        self.check_btn_filter_scanned.checkStateChanged.connect(self.on_check_box_filter_scanned_switch)
 
         if self.is_admin:
             self.check_btn_broadcast.checkStateChanged.connect(
@@ -482,16 +452,7 @@ class MainViewWindow(QMainWindow):
             self.set_enable(False)
             self.drv.Uninitialize(self.pCanHandle)
             self.btn_pcan_init.setText(self.tr("Connect"))
-            self.btn_pcan_init.setStyleSheet('''
-            QPushButton {
-                color: white;
-                background-color: #0078D7;
-                border: none;
-                border-radius: 5px;
-                padding: 5px 10px;
-                font-size: 14px;
-            }
-            ''')
+            theme.set_state(self.btn_pcan_init)
             self.is_connect = False
             return
 
@@ -529,43 +490,23 @@ class MainViewWindow(QMainWindow):
         self.is_connect = result == pCANBasic.PCAN_ERROR_OK
         if self.is_connect:
             self.btn_pcan_init.setText(self.tr("Disconnect"))
-            self.btn_pcan_init.setStyleSheet('''
-            QPushButton {
-                color: white;
-                background-color: #ff7b72;
-                border: none;
-                border-radius: 5px;
-                padding: 5px 10px;
-                font-size: 14px;
-            }
-            ''')
+            theme.set_state(self.btn_pcan_init, "connected")
 
+            self.pcan_bitrate = baud_rate.value
+            self.apply_reply_filter()
             self.startWork()
         else:
             self.stopWork()
             self.btn_pcan_init.setText(self.tr("Connect"))
 
-            self.btn_pcan_init.setStyleSheet('''
-            QPushButton {
-                color: white;
-                background-color: #0078D7;
-                border: none;
-                border-radius: 5px;
-                padding: 5px 10px;
-                font-size: 14px;
-            }
-            ''')
+            theme.set_state(self.btn_pcan_init)
 
     def on_sensor_cal_add_btn_click(self):
-        if len(self.sensorCalParamList.sensorCalParam) == 0:
-            self.sensorCalParamList.sensorCalParam.append(SensorCalParam())
+        if len(self.cal_table) == 0:
+            self.cal_table.insert(0, 0)
         else:
-            self.sensorCalParamList.sensorCalParam.append(
-                SensorCalParam(
-                    adValue=self.sensorCalParamList.sensorCalParam[-1].adValue + 10,
-                    rangeValue=self.sensorCalParamList.sensorCalParam[-1].rangeValue + 10
-                )
-            )
+            ad_value, range_value = self.cal_table[-1]
+            self.cal_table.insert(ad_value + 10, range_value + 10)
         self.table_model.update()
 
     def on_sensor_cal_minus_btn_click(self):
@@ -582,10 +523,7 @@ class MainViewWindow(QMainWindow):
             filter="JSON Files (*.json)"
         )
         if file_path:
-            js_data = self.sensorCalParamList.model_dump(mode="json", by_alias=True)
-            js_file = json.dumps(js_data, indent=2)
-            with open(file_path,'w',encoding="utf-8") as f:
-                f.write(js_file)
+            self.cal_table.save(file_path)
 
 
 
@@ -596,19 +534,15 @@ class MainViewWindow(QMainWindow):
         if not file:
             return
 
-        with open(file, "r") as data:
-            read_file =  data.read()
-        js_data = json.loads(read_file)
-        self.sensorCalParamList = SensorCalParamList.model_validate(js_data)
-        self.table_model.update(self.sensorCalParamList)
+        self.cal_table = CalTable.load(file)
+        self.table_model.update(self.cal_table)
+        if self.is_connect and self.current_can_id != -1:
+            self.sensor_registry.set_cal_file(self.pCanHandle, self.current_can_id, file)
+            self.save_sensor_registry()
 
 
 
 
-    def on_sensor_cal_sort_btn_click(self):
-        self.sensorCalParamList.sort()
-        self.table_model.update()
-
     def on_scan_id_combo_change(self, value):
         if self.combo_edit_id.count() == 0:
             self.current_can_id = -1
@@ -620,28 +554,76 @@ class MainViewWindow(QMainWindow):
             self.check_btn_read_sensor_value.setChecked(False)
             self.send_can_frame([Command.Switch, 0x01], True)
 
-            self.is_scan_can_id = True
-            self.scan_can_id_list.clear()
-            QTimer.singleShot(500, lambda: self.on_scan_can_id(1))
-            self.set_status_bar(0, self.tr("Scan Can Id:"))
-
-    def on_scan_can_id(self, num: int):
-        self.set_status_bar(100 / 4 * num, self.tr("Scan Can Id:"))
-
-        if num >= 4:
-            self.is_scan_can_id = False
-            self.combo_edit_id.clear()
-            self.set_status_bar(100 / 4 * num, self.tr("Scan Can Id:"), self.tr("Done"), True)
-            if len(self.scan_can_id_list) > 0:
-                self.combo_edit_id.addItems(self.scan_can_id_list)
-                self.spin_edit_id.setValue(int(self.combo_edit_id.currentText()))
-                self.current_can_id = int(self.combo_edit_id.currentText())
-                return
-            self.current_can_id = -1
-            print("scan can id stop")
+            self.start_scan_can_id()
+
+    def start_scan_can_id(self):
+        """开始扫描 CanId，总线静默（见 IdDiscovery）后结束"""
+        # 扫描期间接收全部应答帧，扫描结束后再按需只接收扫描到的传感器
+        self.apply_reply_filter()
+        self.is_scan_can_id = True
+        self.scan_can_id_list.clear()
+        self.id_discovery.start(time.monotonic())
+        self.scan_timer.start()
+        self.set_status_bar(0, self.tr("Scan Can Id:"))
+
+    def on_scan_can_id(self):
+        now = time.monotonic()
+        if not self.id_discovery.finished(now):
+            self.set_status_bar(100 * self.id_discovery.progress(now), self.tr("Scan Can Id:"))
             return
 
-        QTimer.singleShot(500, lambda: self.on_scan_can_id(num + 1))
+        self.scan_timer.stop()
+        self.is_scan_can_id = False
+        elapsed = int((now - self.id_discovery.start_time) * 1000)
+        self.set_status_bar(100, self.tr("Scan Can Id:"),
+                            self.tr("Done") + " (%d, %d ms)" % (len(self.scan_can_id_list), elapsed), True)
+        self.sensor_registry.update_from_discovery(self.pCanHandle, self.pcan_bitrate, self.id_discovery)
+        self.save_sensor_registry()
+        if len(self.scan_can_id_list) > 0 and self.check_btn_filter_scanned.isChecked():
+            self.apply_reply_filter(self.scan_can_id_list)
+        self.populate_can_id_combo(self.scan_can_id_list, self.id_discovery.latency)
+        if self.current_can_id == -1:
+            self.statusBar().showMessage(self.tr("Scan Can Id:") + " " + self.tr("No pressure sensor was found"), 3000)
+
+    def warm_start_can_ids(self):
+        """用缓存的传感器填充 CanId 列表，返回缓存的传感器数量；接收过滤器在后台扫描结束后再收窄"""
+        records = self.sensor_registry.sensors(self.pCanHandle, self.pcan_bitrate)
+        can_ids = [str(r.canId) for r in records]
+        if can_ids:
+            self.populate_can_id_combo(can_ids)
+        return len(can_ids)
+
+    def save_sensor_registry(self):
+        try:
+            self.sensor_registry.save()
+        except OSError as e:
+            self.statusBar().showMessage(self.tr("The sensor cache could not be saved: %s") % e, 5000)
+
+    def populate_can_id_combo(self, can_ids, latency=None):
+        """更新 CanId 下拉列表，当前传感器仍在列表中时保持选中"""
+        current = str(self.current_can_id)
+        self.combo_edit_id.blockSignals(True)
+        self.combo_edit_id.clear()
+        self.combo_edit_id.addItems(can_ids)
+        # 首次出现的时间和最后加载的标定文件显示在下拉项提示中
+        for i, canId in enumerate(can_ids):
+            tips = []
+            if latency and int(canId) in latency:
+                tips.append(self.tr("First seen after %d ms") % (latency[int(canId)] * 1000))
+            record = self.sensor_registry.record(self.pCanHandle, int(canId))
+            if record is not None and record.calFile:
+                tips.append(self.tr("Last calibration file: %s") % record.calFile)
+            if tips:
+                self.combo_edit_id.setItemData(i, "\n".join(tips), Qt.ItemDataRole.ToolTipRole)
+        if current in can_ids:
+            self.combo_edit_id.setCurrentIndex(can_ids.index(current))
+        self.combo_edit_id.blockSignals(False)
+
+        if self.combo_edit_id.count() == 0:
+            self.current_can_id = -1
+            return
+        self.spin_edit_id.setValue(int(self.combo_edit_id.currentText()))
+        self.current_can_id = int(self.combo_edit_id.currentText())
 
     def on_edit_id_btn_click(self):
         if not self.is_connect:
@@ -672,36 +654,186 @@ class MainViewWindow(QMainWindow):
         pass
 
     def on_cal_save_btn_click(self):
-        self.sensorCalParamList.sort()
-        self.table_model.update()
-        QTimer.singleShot(10, lambda: self.on_cal_save_qtimer(0))
-        self.set_status_bar(0, self.tr("Save Cal Data:"))
-
-    def on_cal_save_qtimer(self, index):
-        if index >= len(self.sensorCalParamList.sensorCalParam):
-            result = self.send_can_frame([Command.Switch, 0x02])
-            self.set_status_bar(100 / len(self.sensorCalParamList.sensorCalParam) * index, self.tr("Save Cal Data:"),
-                                self.tr("Done"), True)
-
-            return
-
-        param = self.sensorCalParamList.sensorCalParam[index]
-        data = [0] * 8
-        data[0] = Command.Cal
-        data[1] = index
-        data[2] = param.adValue & 0xFF
-        data[3] = (param.adValue >> 8) & 0xFF
-        data[4] = (param.adValue >> 16) & 0xFF
-        data[5] = (param.adValue >> 24) & 0xFF
-        data[6] = param.rangeValue & 0xFF
-        data[7] = (param.rangeValue >> 8) & 0xFF
-        result = self.send_can_frame(data)
-        if result == pCANBasic.PCAN_ERROR_OK:
-            QTimer.singleShot(10, lambda: self.on_cal_save_qtimer(index + 1))
-            self.set_status_bar(100 / len(self.sensorCalParamList.sensorCalParam) * index, self.tr("Save Cal Data:"))
+        if self.cal_writer is not None:
+            return
+        if self.is_broadcast:
+            can_id = self.broadcast_id
+        elif self.current_can_id == -1:
+            QMessageBox.critical(self, self.tr("Error"), self.tr("The pressure sensor was not scanned"))
+            return
+        else:
+            can_id = self.current_can_id
+
+        points = self.cal_table.points()
+        # 广播写入时无法区分各传感器的确认，按固定间隔发送
+        require_ack = self.check_btn_cal_ack.isChecked() and not self.is_broadcast
+        self.start_cal_write([self.create_cal_writer(can_id, points, require_ack)])
+
+    def on_cal_batch_save_btn_click(self):
+        """从目录中的 <CanId>.json 标定文件同时写入多个传感器"""
+        if self.cal_writer is not None:
+            return
+        directory = QFileDialog.getExistingDirectory(self, self.tr("Select calibration directory"))
+        if not directory:
+            return
+
+        require_ack = self.check_btn_cal_ack.isChecked()
+        writers = []
+        for can_id, (path, table) in sorted(self.load_cal_directory(directory).items()):
+            self.sensor_registry.set_cal_file(self.pCanHandle, can_id, path)
+            writers.append(self.create_cal_writer(can_id, table.points(), require_ack))
+        if not writers:
+            QMessageBox.critical(self, self.tr("Error"), self.tr("No <CAN ID>.json calibration file was found"))
+            return
+        self.save_sensor_registry()
+        self.start_cal_write(writers)
+
+    @staticmethod
+    def load_cal_directory(directory):
+        """读取目录中以 CanId 命名的标定文件，返回 {can_id: (文件路径, CalTable)}"""
+        tables = {}
+        for name in os.listdir(directory):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != ".json" or not stem.isdigit() or not 0 < int(stem) < 0xFF:
+                continue
+            path = os.path.join(directory, name)
+            tables[int(stem)] = path, CalTable.load(path)
+        return tables
+
+    def create_cal_writer(self, can_id, points, require_ack):
+        return CalTableWriter(can_id, points, require_ack=require_ack, frame_interval=0 if require_ack else 0.01)
+
+    def start_cal_write(self, writers):
+        self.cal_writer = CalWriteScheduler(writers)
+        self.set_status_bar(0, self.cal_write_status_text())
+        self.cal_write_timer.start()
+
+    def cal_write_status_text(self):
+        scheduler = self.cal_writer
+        if len(scheduler) == 1:
+            return self.tr("Save Cal Data:")
+        return self.tr("Save Cal Data:") + " %d/%d" % (len(scheduler.done_ids), len(scheduler))
+
+    def on_cal_write_timer(self):
+        scheduler = self.cal_writer
+        if scheduler is None:
+            self.cal_write_timer.stop()
+            return
+
+        scheduler.pump(self.write_can_frame, time.monotonic())
+        if not scheduler.done:
+            self.set_status_bar(100 * scheduler.progress, self.cal_write_status_text())
+            return
+
+        self.cal_write_timer.stop()
+        self.cal_writer = None
+        if not scheduler.failed:
+            self.set_status_bar(100, self.tr("Save Cal Data:"), self.tr("Done"), True)
+            return
+
+        if len(scheduler) == 1:
+            failed = ", ".join(str(i) for i in next(iter(scheduler.writers.values())).failed_indices)
         else:
-            self.set_status_bar(100 / len(self.sensorCalParamList.sensorCalParam) * index, self.tr("Save Cal Data:"),
-                                self.tr("Failure"), True, False)
+            failed = self.tr("CAN ID") + " " + ", ".join(str(i) for i in scheduler.failed_ids)
+        self.set_status_bar(100 * scheduler.progress, self.tr("Save Cal Data:"),
+                            self.tr("Failure") + (" (%s)" % failed if failed else ""), True, False)
+
+    def on_record_btn_click(self):
+        if self.recorder is not None:
+            self.stop_recording()
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(self, self.tr("Record received frames"), "",
+                                                   "PCAN Record (*.pcanrec)")
+        if not file_path:
+            return
+        try:
+            self.recorder = FrameRecorder(file_path).start()
+        except OSError as e:
+            QMessageBox.critical(self, self.tr("Error"), str(e))
+            return
+        self.btn_record.setText(self.tr("Stop Recording"))
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return
+        recorder.close()
+        self.btn_record.setText(self.tr("Record"))
+        if recorder.error is not None:
+            QMessageBox.critical(self, self.tr("Error"), str(recorder.error))
+            return
+        self.statusBar().showMessage(self.tr("Recorded %d frames, %d dropped") %
+                                     (recorder.frames_recorded, recorder.frames_dropped), 5000)
+
+    def virtual_bus(self):
+        """虚拟驱动的 VirtualBus，使用硬件驱动时为 None"""
+        return getattr(self.drv, "bus", None)
+
+    def on_replay_btn_click(self):
+        if self.replay is not None:
+            self.stop_replay()
+            return
+
+        file_path, _ = QFileDialog.getOpenFileName(self, self.tr("Replay recorded frames"), "",
+                                                   "PCAN Record (*.pcanrec)")
+        if not file_path:
+            return
+        speed = self.replay_speed_list[self.combo_replay_speed.currentText()]
+        try:
+            self.replay = FrameReplay.from_file(self.virtual_bus(), file_path, channel=self.pCanHandle,
+                                                speed=speed or 1.0, realtime=speed > 0)
+        except (OSError, RecordFormatError) as e:
+            QMessageBox.critical(self, self.tr("Error"), str(e))
+            return
+        self.replay.start()
+        self.replay_timer.start()
+        self.btn_replay.setText(self.tr("Stop Replay"))
+        self.set_replay_slider(0)
+        self.slider_replay_position.setEnabled(True)
+        self.set_status_bar(0, self.tr("Replay:"))
+
+    def on_replay_speed_change(self, value):
+        speed = self.replay_speed_list[value]
+        if self.replay is not None and self.replay.realtime and speed > 0:
+            self.replay.set_speed(speed)
+
+    def on_replay_position_change(self, value):
+        """拖动或点击位置滑块时跳到对应的记录时间"""
+        if self.replay is not None:
+            self.replay.seek(self.replay.duration * value / self.replay_slider_steps)
+
+    def set_replay_slider(self, value):
+        """按回放进度移动滑块，不触发跳转"""
+        if self.slider_replay_position.isSliderDown():
+            return
+        self.slider_replay_position.blockSignals(True)
+        self.slider_replay_position.setValue(value)
+        self.slider_replay_position.blockSignals(False)
+
+    def on_replay_timer(self):
+        replay = self.replay
+        if replay is None:
+            self.replay_timer.stop()
+            return
+        if replay.finished:
+            self.stop_replay()
+            return
+        if replay.duration > 0:
+            self.set_replay_slider(round(self.replay_slider_steps * replay.current_time / replay.duration))
+        self.set_status_bar(100 * replay.progress,
+                            self.tr("Replay:") + " %.1f s, %d fps" % (replay.current_time, replay.frames_per_second))
+
+    def stop_replay(self):
+        replay, self.replay = self.replay, None
+        self.replay_timer.stop()
+        if replay is None:
+            return
+        replay.stop()
+        self.btn_replay.setText(self.tr("Replay"))
+        self.slider_replay_position.setEnabled(False)
+        self.set_status_bar(100 * replay.progress, self.tr("Replay:"),
+                            self.tr("Replayed %d frames, %d fps") % (replay.sent, replay.frames_per_second), True)
 
     def on_plant_save_btn_click(self):
         self.send_can_frame([Command.Save])
@@ -711,8 +843,126 @@ class MainViewWindow(QMainWindow):
 
 
     def on_table_acq_btn_click(self, index: QModelIndex):
-        self.sensorCalParamList.sensorCalParam[index.row()].adValue = self.current_sensor_ad_value
+        """在采集窗口内累计当前传感器的每一帧 AD 值，结束后写入均值"""
+        if not self.is_connect or self.current_can_id == -1:
+            QMessageBox.critical(self, self.tr("Error"), self.tr("The pressure sensor was not scanned"))
+            return
+        if self.acquisition is not None or self.plateau is not None:
+            self.statusBar().showMessage(self.tr("Acquisition in progress"), 1500)
+            return
+        samples, duration = self.acq_window_list[self.combo_acq_window.currentText()]
+        window = AcquisitionWindow(self.current_can_id, samples, duration)
+        self.acquisition = (index.row(), window, self.metrics.overruns + self.metrics.frames_lost)
+        # 标定表按 adValue 排序，采集期间编辑会改变行号，均值写入错误的标定点
+        self.set_cal_table_editable(False)
+        self.pipeline.sensor_state.ad_stats = self.ad_stats
+        window.start(self.ad_stats, time.monotonic())
+        self.acq_timer.start()
+        self.statusBar().showMessage(self.tr("Acquiring ID %d ...") % window.can_id)
+
+    def on_acq_timer(self):
+        row, window, frame_loss = self.acquisition
+        if not window.finished(self.ad_stats, time.monotonic()):
+            return
+        self.stop_acquisition()
+        stats = self.ad_stats.summary(window.can_id)
+        if not window.complete(self.ad_stats):
+            QMessageBox.warning(self, self.tr("warning"),
+                                self.tr("Acquisition received %d AD values from ID %d") %
+                                (stats["count"], window.can_id))
+            return
+        if self.metrics.overruns + self.metrics.frames_lost != frame_loss:
+            QMessageBox.warning(self, self.tr("warning"),
+                                self.tr("Frames were lost during acquisition, please acquire again"))
+            return
+        if 0 <= row < len(self.cal_table):
+            self.cal_table.set_ad_value(row, int(round(stats["mean"])))
+            self.table_model.update()
+        self.statusBar().showMessage(
+            self.tr("ID %d: %d samples, mean %.1f, std %.1f, min %d, max %d") %
+            (window.can_id, stats["count"], stats["mean"], stats["std"], stats["min"], stats["max"]))
+
+    def on_check_box_auto_capture_switch(self, value):
+        if value != Qt.CheckState.Checked:
+            self.stop_auto_capture()
+            return
+        if not self.is_connect or self.current_can_id == -1:
+            QMessageBox.critical(self, self.tr("Error"), self.tr("The pressure sensor was not scanned"))
+            self.check_btn_auto_capture.setChecked(False)
+            return
+        if self.acquisition is not None:
+            self.statusBar().showMessage(self.tr("Acquisition in progress"), 1500)
+            self.check_btn_auto_capture.setChecked(False)
+            return
+        text = self.input_reference_values.text().replace("，", ",").strip()
+        try:
+            references = [int(v) for v in text.split(",") if v.strip()]
+        except ValueError:
+            QMessageBox.critical(self, self.tr("Error"), self.tr("Reference values must be integers separated by commas"))
+            self.check_btn_auto_capture.setChecked(False)
+            return
+        if not references:
+            # 没有参考值时平台只能配对一个假定的物理值，插入的点会被当作有效标定点
+            QMessageBox.critical(self, self.tr("Error"), self.tr("Enter the reference values before auto capture"))
+            self.check_btn_auto_capture.setChecked(False)
+            return
+
+        can_id = self.current_can_id
+        self.plateau = (can_id, PlateauDetector(), references, self.metrics.overruns + self.metrics.frames_lost)
+        self.pipeline.sensor_state.ad_stats = self.ad_stats
+        self.ad_stats.start(can_id)
+        self.plateau_timer.start()
+        self.statusBar().showMessage(self.tr("Auto capture on ID %d, waiting for a stable reading") % can_id)
+
+    def on_plateau_timer(self):
+        """每块结束时把 AD 值统计交给 PlateauDetector，检测到平台时添加标定点"""
+        can_id, detector, references, frame_loss = self.plateau
+        stats = self.ad_stats
+        count, mean, m2 = int(stats.count[can_id]), float(stats.mean[can_id]), float(stats.m2[can_id])
+        stats.start(can_id)
+        loss = self.metrics.overruns + self.metrics.frames_lost
+        if loss != frame_loss:
+            # 丢帧的块不可信，重新累计
+            self.plateau = (can_id, detector, references, loss)
+            detector.reset()
+            return
+        result = detector.add_block(time.monotonic(), count, mean, m2)
+        if result is None:
+            return
+
+        reference = references.pop(0)
+        self.cal_table.insert(int(round(result["mean"])), reference)
         self.table_model.update()
+        self.statusBar().showMessage(
+            self.tr("ID %d: captured AD %d = %d (%d samples, std %.1f)") %
+            (can_id, round(result["mean"]), reference, result["count"], result["std"]))
+        if not references:
+            # 参考值已全部配对
+            self.check_btn_auto_capture.setChecked(False)
+
+    def stop_auto_capture(self):
+        self.plateau_timer.stop()
+        if self.plateau is not None:
+            self.ad_stats.stop(self.plateau[0])
+            self.plateau = None
+            self.pipeline.sensor_state.ad_stats = None
+        if self.check_btn_auto_capture.isChecked():
+            self.check_btn_auto_capture.setChecked(False)
+
+    def stop_acquisition(self):
+        self.acq_timer.stop()
+        if self.acquisition is not None:
+            self.ad_stats.stop(self.acquisition[1].can_id)
+            self.acquisition = None
+            self.set_cal_table_editable(True)
+        self.pipeline.sensor_state.ad_stats = None
+
+    def set_cal_table_editable(self, enable):
+        """标定表编辑与增删、加载（会改变行号的操作）"""
+        self.table_view_sensor_cal.setEnabled(enable)
+        self.btn_sensor_cal_add.setEnabled(enable)
+        self.btn_sensor_cal_minus.setEnabled(enable)
+        self.btn_load_cal.setEnabled(enable)
 
     def on_check_box_pressure_value_switch(self, value):
         # self.check_data_base(20)
@@ -721,57 +971,75 @@ class MainViewWindow(QMainWindow):
             self.send_can_frame([Command.Switch, 0x00], True)
         else:
             self.send_can_frame([Command.Switch, 0x01], True)
-            self.sensorCalParamList.sort()
-            self.table_model.update()
 
 
-    def on_worker_result_callback(self, result):
-        if len(result) == 0:
+    def on_check_box_filter_scanned_switch(self, value):
+        if not self.is_connect or self.is_scan_can_id:
             return
+        if value == Qt.CheckState.Checked and len(self.scan_can_id_list) > 0:
+            self.apply_reply_filter(self.scan_can_id_list)
+        else:
+            self.apply_reply_filter()
 
-        for msg in result:
-            if not tool.can_id_check_gression_700(msg[0].ID):
-                continue
+    def apply_reply_filter(self, can_ids=None):
+        """只接收传感器应答帧（0x700-0x7FF），can_ids 不为空时只接收这些传感器"""
+        result = configure_reply_filter(self.drv, self.pCanHandle, [int(i) for i in can_ids] if can_ids else None)
+        if result != pCANBasic.PCAN_ERROR_OK:
+            self.statusBar().showMessage(self.tr("The message filter could not be configured"), 3000)
+        return result
 
-            canId = tool.can_id_remove_gression(msg[0].ID)
-            data = msg[0].DATA
+    def create_receive_pipeline(self):
+        """新的接收管线（环形缓冲区与传感器状态），运行指标沿用 self.metrics"""
+        pipeline = ReceivePipeline(self.drv, self.frame_buffer_capacity, self.metrics)
+        pipeline.sensor_state.default_curve = self.calibration_curve
+        pipeline.sensor_state.add_consumer(self.on_sensor_state_updated)
+        return pipeline
 
-            if self.is_scan_can_id and (str(canId) not in self.scan_can_id_list):
+    def on_worker_result_callback(self, result):
+        start, end, read_us, status = result
+        self.pipeline.deliver(start, end, read_us, self.cal_writer, self.check_btn_read_sensor_value.isChecked())
+        if status != self.reported_read_status:
+            # 只在状态变化时提示，接收线程按轮询间隔继续读取
+            self.reported_read_status = status
+            if status != pCANBasic.PCAN_ERROR_OK:
+                text = self.GetFormatedError(status)
+                if isinstance(text, bytes):
+                    text = text.decode(errors="replace")
+                self.statusBar().showMessage(self.tr("Receive error: %s") % text, 5000)
+        frame_loss = self.metrics.overruns + self.metrics.frames_lost
+        if frame_loss != self.reported_frame_loss:
+            self.reported_frame_loss = frame_loss
+            self.statusBar().showMessage(
+                self.tr("Frames lost: %d receive queue overruns, %d frames not processed in time") %
+                (self.metrics.overruns, self.metrics.frames_lost), 5000)
+
+    def on_sensor_state_updated(self, state, can_ids):
+        if self.is_scan_can_id:
+            for canId in self.id_discovery.observe(can_ids, time.monotonic(), state.frame_count[can_ids]):
                 self.scan_can_id_list.append(str(canId))
 
-            if canId != self.current_can_id:
-                continue
-
-            if self.check_btn_read_sensor_value.isChecked() and msg[0].LEN == 2:
-                sensorValue = tool.remove_gression_high_3(data[0], data[1])
-                self.text_read_sensor_value.setText(str(sensorValue))
-            else:
-                adValue = tool.merge_int8_to_int32(data)
-                self.current_sensor_ad_value = adValue
-                self.text_read_ad_value.setText(str(adValue))
-
-                index_1, index_2 = self.check_data_base(adValue)
-                if index_1 == -1:
-                    self.text_read_sensor_value.setText("Error")
-
-                elif index_1 == index_2:
-                    self.text_read_sensor_value.setText(str(self.sensorCalParamList.sensorCalParam[index_1].rangeValue))
-                else:
-                    # y = m*x+b
-                    x1, x2, y1, y2 = (self.sensorCalParamList.sensorCalParam[index_1].adValue,
-                                      self.sensorCalParamList.sensorCalParam[index_2].adValue,
-                                      self.sensorCalParamList.sensorCalParam[index_1].rangeValue,
-                                      self.sensorCalParamList.sensorCalParam[index_2].rangeValue)
-
-                    m = (y2 - y1) / (x2 - x1)
-                    b = y1 - m * x1
+        if self.current_can_id in can_ids:
+            self.display_coalescer.post(self.current_can_id)
 
-                    value = m * adValue + b
-                    self.text_read_sensor_value.setText(f'%.2f' % value)
+    def on_display_refresh(self, can_id, _):
+        if can_id == self.current_can_id:
+            self.show_sensor_state(can_id)
 
-            # print(adValue)
+    def show_sensor_state(self, can_id):
+        state = self.pipeline.sensor_state
+        self.current_sensor_ad_value = int(state.ad_value[can_id])
+        self.text_read_ad_value.setText(str(self.current_sensor_ad_value))
+        if state.value_reported[can_id]:
+            self.text_read_sensor_value.setText(str(int(state.sensor_value[can_id])))
+            return
 
-        # print(result)
+        value = state.curve(can_id).evaluate(self.current_sensor_ad_value)
+        if value is None:
+            self.text_read_sensor_value.setText("Error")
+        elif isinstance(value, int):
+            self.text_read_sensor_value.setText(str(value))
+        else:
+            self.text_read_sensor_value.setText(f'%.2f' % value)
 
     def GetDeviceName(self, handle):
         switcher = {
@@ -815,40 +1083,32 @@ class MainViewWindow(QMainWindow):
             return stsReturn[1]
 
     def readMsg(self):
-        stsResult = pCANBasic.PCAN_ERROR_OK
-        results = []
-        while self.pCanHandle and not (stsResult & pCANBasic.PCAN_ERROR_QRCVEMPTY):
-            result = self.drv.Read(self.pCanHandle)
-            stsResult = result[0]
-            if result[0] == pCANBasic.PCAN_ERROR_OK:
-                results.append(result[1:])
-            elif result[0] & pCANBasic.PCAN_ERROR_ILLOPERATION:
-                break
-        return results
+        """
+        在接收线程中读空驱动队列，写入环形缓冲区（ReceivePipeline.drain）
+
+        返回 (start, end, read_us, status)：本次写入的帧序号区间、读取完成时间（metrics.now_us）
+        与结束读取的驱动状态（PCAN_ERROR_OK 为读空队列）
+        """
+        if not self.pCanHandle:
+            head = self.pipeline.frame_buffer.head
+            return head, head, now_us(), pCANBasic.PCAN_ERROR_OK
+        start, end, status = self.pipeline.drain(self.pCanHandle, self.recorder)
+        return start, end, now_us(), status
+
+    def write_can_frame(self, can_id: int, data: list):
+        """向 can_id 的传感器写入一帧指令，返回 TPCANStatus，不弹出错误提示"""
+        return write_command(self.drv, self.pCanHandle, can_id, data)
 
     def send_can_frame(self, data: list, is_broadcast=False):
-        canMsg = pCANBasic.TPCANMsg()
-        if is_broadcast:
-            canMsg.ID = tool.can_id_generate_gression_300(self.broadcast_id)
+        if is_broadcast or self.is_broadcast:
+            can_id = self.broadcast_id
         else:
-            if self.is_broadcast:
-                canMsg.ID = tool.can_id_generate_gression_300(self.broadcast_id)
-            else:
-                if self.current_can_id == -1:
-                    QMessageBox.critical(self, self.tr("Error"), self.tr("The pressure sensor was not scanned"))
-                    return
-                canMsg.ID = tool.can_id_generate_gression_300(self.current_can_id)
-
-        canMsg.LEN = 8
-        canMsg.MSGTYPE = pCANBasic.PCAN_MESSAGE_STANDARD
-
-        for i in range(8):
-            if i < len(data):
-                canMsg.DATA[i] = data[i]
-            else:
-                canMsg.DATA[i] = 0
+            if self.current_can_id == -1:
+                QMessageBox.critical(self, self.tr("Error"), self.tr("The pressure sensor was not scanned"))
+                return
+            can_id = self.current_can_id
 
-        result = self.drv.Write(self.pCanHandle, canMsg)
+        result = self.write_can_frame(can_id, data)
         if result != pCANBasic.PCAN_ERROR_OK:
             QMessageBox.critical(self, self.tr("Error"),
                                  str(self.GetFormatedError(result)) if type(result) == int else result)
@@ -862,52 +1122,24 @@ class MainViewWindow(QMainWindow):
             self.status_bar_label.hide()
             self.statusBar().showMessage(info_done, 1500)
             return
-        if state:
-            self.status_bar_progress.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid;
-                text-align: center;
-            }
-
-            QProgressBar::chunk {
-                background-color: #02913a;
-                width: 50px;
-            }
-            """)
-        else:
-            self.status_bar_progress.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid;
-                text-align: center;
-            }
-
-            QProgressBar::chunk {
-                background-color: #ff0000;
-                width: 50px;
-            }
-            """)
+        theme.set_state(self.status_bar_progress, "" if state else "error")
 
         self.status_bar_label.setText(info)
         self.status_bar_progress.setValue(progress)
         self.status_bar_progress.show()
         self.status_bar_label.show()
 
-    def check_data_base(self, value):
-        ad_values = [param.adValue for param in self.sensorCalParamList.sensorCalParam]
-        ge_index = bisect.bisect_left(ad_values, value)  # 第一个 >= value 的位置
-        le_index = bisect.bisect_right(ad_values, value) - 1  # 最后一个 <= value 的位置
-        if ge_index >= len(self.sensorCalParamList.sensorCalParam):
-            ge_index = -1
-        if le_index < 0:
-            le_index = -1
-        # print(ad_values[le_index], value, ad_values[ge_index])
-
-        return ge_index, le_index
+    def rebuild_calibration_curve(self, *args):
+        self.calibration_curve = CalibrationCurve.from_table(self.cal_table)
+        self.pipeline.sensor_state.default_curve = self.calibration_curve
 
     def set_enable(self,enable):
         self.box_sensor_set.setEnabled(enable)
         self.btn_plant_save.setEnabled(enable)
         self.btn_cal_save.setEnabled(enable)
+        self.btn_cal_batch_save.setEnabled(enable)
+        self.btn_record.setEnabled(enable)
+        self.btn_replay.setEnabled(enable and self.virtual_bus() is not None)
         self.btn_recover_plant.setEnabled(enable)
 
     def startWork(self):
@@ -919,33 +1151,91 @@ class MainViewWindow(QMainWindow):
         self.check_btn_read_sensor_value.setChecked(False)
         self.current_sensor_ad_value = 0
         self.current_can_id = -1
-        self.is_scan_can_id = True
-        self.scan_can_id_list.clear()
-        QTimer.singleShot(500, lambda: self.on_scan_can_id(1))
-        self.set_status_bar(0, self.tr("Scan Can Id:"))
-
+        self.pipeline.sensor_state.reset()
+        self.display_coalescer.clear()
+        self.metrics.reset()
+        self.reported_frame_loss = 0
+        self.reported_read_status = pCANBasic.PCAN_ERROR_OK
+        self.metrics_timer.start()
+        # 有缓存时立即可用，扫描在后台确认传感器是否在线
+        self.warm_start_can_ids()
+        self.start_scan_can_id()
+
+        self.receive_event, fallback_reason = open_receive_event(self.drv, self.pCanHandle)
         self.workThread = QThread()
-        self.worker = ReadCanMsgWork(self.readMsg)
+        self.worker = ReadCanMsgWork(self.readMsg, receive_event=self.receive_event, fallback_reason=fallback_reason,
+                                     result_size=lambda result: result[1] - result[0])
         self.worker.moveToThread(self.workThread)
         self.workThread.started.connect(self.worker.start_work)
         self.worker.finishedSignal.connect(self.workThread.quit)
         self.worker.finishedSignal.connect(self.worker.deleteLater)
         self.workThread.finished.connect(self.workThread.deleteLater)
-        self.workThread.finished.connect(self._work_finished_cleanup)
 
         self.worker.resultSignal.connect(self.on_worker_result_callback)
+        self.worker.modeSignal.connect(self.on_receive_mode_changed)
+        self.worker.error_signal.connect(self.on_worker_error)
         self.workThread.start()
 
     def stopWork(self):
+        self.stop_acquisition()
+        self.stop_auto_capture()
+        self.stop_recording()
+        self.stop_replay()
+        self.cal_write_timer.stop()
+        self.scan_timer.stop()
+        self.is_scan_can_id = False
+        self.cal_writer = None
         if self.worker:
             self.worker.stop_work()
         if self.workThread:
             self.workThread.quit()
             self.workThread.wait()
-
-    def _work_finished_cleanup(self):
-        self.worler = None
+        # 线程已结束，worker 与线程由 deleteLater 释放；不在 finished 信号中清空，避免覆盖重新连接后的引用
+        self.worker = None
         self.workThread = None
+        if self.receive_event:
+            self.receive_event.close()
+            self.receive_event = None
+        self.pipeline = self.create_receive_pipeline()
+        self.display_coalescer.clear()
+        self.status_bar_mode_label.clear()
+        self.metrics_timer.stop()
+        self.status_bar_metrics_label.clear()
+
+    def on_metrics_timer(self):
+        text = self.metrics.summary()
+        if self.current_can_id != -1 and self.metrics.latency_by_id.count(self.current_can_id):
+            latency = self.metrics.latency_by_id.summary(self.current_can_id)
+            interval = self.metrics.interval_by_id.summary(self.current_can_id)
+            text += " | ID %d p50/p99/max %.1f/%.1f/%.1f ms, interval p99 %.1f ms" % (
+                self.current_can_id, latency["p50"], latency["p99"], latency["max"], interval["p99"])
+        self.status_bar_metrics_label.setText(text)
+
+    def on_metrics_dump(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, self.tr("Save pipeline metrics"),
+                                                   time.strftime("metrics-%Y%m%d-%H%M%S.json"),
+                                                   "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            self.metrics.dump(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, self.tr("Error"), str(e))
+
+    def on_worker_error(self, message):
+        """接收线程中读取失败（驱动异常等），接收已停止"""
+        self.status_bar_mode_label.setText(self.tr("Receive: Stopped"))
+        self.statusBar().showMessage(self.tr("Receive error: %s") % message)
+
+    def on_receive_mode_changed(self, mode, reason=""):
+        if mode == ReadCanMsgWork.RECEIVE_MODE_EVENT:
+            self.status_bar_mode_label.setText(self.tr("Receive: Event"))
+            self.status_bar_mode_label.setToolTip("")
+        else:
+            self.status_bar_mode_label.setText(self.tr("Receive: Polling"))
+            self.status_bar_mode_label.setToolTip(reason)
+            if reason:
+                self.statusBar().showMessage(self.tr("Receive event unavailable, polling: %s") % reason, 5000)
 
     def check_admin(self):
         path = os.path.join(os.getcwd(), ".admin")
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+标定表
+
+按 adValue 升序保存的两个并列 int 列表，插入和修改 adValue 时用二分查找放到有序位置，不需要整表排序。
+文件格式仍为 SensorCalParamList 的 JSON，只在 load / save 时转换。
+"""
+import bisect
+import json
+
+from .dataModel import SensorCalParam, SensorCalParamList
+
+
+class CalTable:
+    __slots__ = ("ad_values", "range_values")
+
+    def __init__(self, points=()):
+        """points 为 (adValue, rangeValue) 序列，adValue 相同的点保持原有顺序"""
+        points = sorted(points, key=lambda p: p[0])
+        self.ad_values = [int(p[0]) for p in points]
+        self.range_values = [int(p[1]) for p in points]
+
+    def __len__(self):
+        return len(self.ad_values)
+
+    def __getitem__(self, index: int):
+        return self.ad_values[index], self.range_values[index]
+
+    def __iter__(self):
+        return zip(self.ad_values, self.range_values)
+
+    def points(self):
+        """[(adValue, rangeValue), ...]，按 adValue 升序"""
+        return list(zip(self.ad_values, self.range_values))
+
+    def insert(self, ad_value: int, range_value: int) -> int:
+        """插入一个点，返回其行号；adValue 相同时放在已有点之后"""
+        index = bisect.bisect_right(self.ad_values, ad_value)
+        self.ad_values.insert(index, int(ad_value))
+        self.range_values.insert(index, int(range_value))
+        return index
+
+    def remove(self, index: int):
+        del self.ad_values[index]
+        del self.range_values[index]
+
+    def set_ad_value(self, index: int, ad_value: int) -> int:
+        """修改第 index 行的 adValue，返回移动后的行号"""
+        range_value = self.range_values[index]
+        self.remove(index)
+        return self.insert(ad_value, range_value)
+
+    def set_range_value(self, index: int, range_value: int):
+        self.range_values[index] = int(range_value)
+
+    @classmethod
+    def from_param_list(cls, params: SensorCalParamList):
+        return cls((p.adValue, p.rangeValue) for p in params.sensorCalParam)
+
+    def to_param_list(self) -> SensorCalParamList:
+        return SensorCalParamList(sensorCalParam=[SensorCalParam(adValue=a, rangeValue=r) for a, r in self])
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as data:
+            return cls.from_param_list(SensorCalParamList.model_validate(json.loads(data.read())))
+
+    def save(self, path: str):
+        js_data = self.to_param_list().model_dump(mode="json", by_alias=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(js_data, indent=2))
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+标定表写入流水线
+
+CalTableWriter 保存一个传感器的全部 Cal 帧，在确认窗口内连续发送，
+根据传感器的确认（见 protocol.is_cal_ack）推进，超时只重发未确认的点，
+全部确认后发送 Switch 0x02 让传感器保存标定表。
+CalWriteScheduler 在同一通道上轮流推进多个传感器的写入器，总的未确认帧数受 max_in_flight 限制。
+"""
+import math
+from enum import IntEnum
+
+from . import pCANBasic
+from .protocol import Command, build_cal_frame, is_cal_ack
+
+
+class CalPointState(IntEnum):
+    PENDING = 0
+    SENT = 1
+    ACKED = 2
+    FAILED = 3
+
+
+class CalTableWriter:
+    FINISH_INDEX = -1  # next_frame 返回的 Switch 0x02 帧序号
+
+    def __init__(self, can_id: int, points, require_ack=False, window=8, ack_timeout=0.1, max_retries=3,
+                 frame_interval=0.01):
+        """
+        can_id          目标传感器（广播写入时为 0xFF，广播无法区分应答，应关闭 require_ack）
+        points          [(adValue, rangeValue), ...]，按写入顺序
+        require_ack     是否等待传感器确认（固件需回送 Cal 帧，见 protocol.is_cal_ack）；
+                        关闭时 Write 成功即视为写入
+        window          未确认帧的最大数量
+        ack_timeout     确认超时（秒），超时后重发
+        max_retries     每个点的最大重发次数，超过后该点失败
+        frame_interval  两帧之间的最小间隔（秒），用于不回送确认的传感器，等待确认时可设为 0
+        """
+        self.can_id = can_id
+        self.frames = [build_cal_frame(i, ad, rng) for i, (ad, rng) in enumerate(points)]
+        self.require_ack = require_ack
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.frame_interval = frame_interval
+
+        self.state = [CalPointState.PENDING] * len(self.frames)
+        self.attempts = [0] * len(self.frames)
+        self.sent_time = [0.0] * len(self.frames)
+        self.acked_count = 0
+        self.retransmits = 0
+        self.finish_sent = False
+        self.finish_attempts = 0
+        self._pending = list(range(len(self.frames)))
+        self._in_flight = []
+        self._last_send = -math.inf
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def failed_indices(self):
+        return [i for i, state in enumerate(self.state) if state == CalPointState.FAILED]
+
+    @property
+    def failed(self) -> bool:
+        if self.finish_attempts > self.max_retries:
+            return True
+        return not self._pending and not self._in_flight and self.acked_count < len(self.frames)
+
+    @property
+    def done(self) -> bool:
+        return self.finish_sent or self.failed
+
+    @property
+    def progress(self) -> float:
+        return self.acked_count / len(self.frames) if self.frames else 1.0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def next_frame(self, now: float, allow_new=True):
+        """
+        返回下一帧 (index, data)，暂时没有可发送的帧时返回 None
+
+        allow_new 为 False 时只返回超时重发的帧
+        """
+        if self.done or now - self._last_send < self.frame_interval:
+            return None
+
+        for index in list(self._in_flight):
+            if now - self.sent_time[index] < self.ack_timeout:
+                continue
+            if self.attempts[index] > self.max_retries:
+                self._in_flight.remove(index)
+                self.state[index] = CalPointState.FAILED
+                continue
+            return index, self.frames[index]
+
+        if not allow_new:
+            return None
+        if self._pending and len(self._in_flight) < self.window:
+            index = self._pending[0]
+            return index, self.frames[index]
+
+        if self.acked_count == len(self.frames):
+            return self.FINISH_INDEX, [Command.Switch, 0x02]
+        return None
+
+    def on_sent(self, index: int, now: float):
+        """next_frame 返回的帧已成功写入驱动"""
+        self._last_send = now
+        if index == self.FINISH_INDEX:
+            self.finish_sent = True
+            return
+
+        if self.attempts[index] > 0:
+            self.retransmits += 1
+        self.attempts[index] += 1
+        self.sent_time[index] = now
+        if self.state[index] == CalPointState.PENDING:
+            self._pending.remove(index)
+            if self.require_ack:
+                self._in_flight.append(index)
+        if self.require_ack:
+            self.state[index] = CalPointState.SENT
+        else:
+            self._ack(index)
+
+    def on_send_error(self, index: int, now: float):
+        """写入驱动失败（发送队列满以外的错误），计为一次尝试"""
+        if index == self.FINISH_INDEX:
+            self.finish_attempts += 1
+            return
+        self.attempts[index] += 1
+        self.sent_time[index] = now
+        if self.attempts[index] > self.max_retries:
+            if index in self._pending:
+                self._pending.remove(index)
+            if index in self._in_flight:
+                self._in_flight.remove(index)
+            self.state[index] = CalPointState.FAILED
+
+    def on_reply(self, can_id: int, data, length: int) -> bool:
+        """处理传感器应答帧，是本写入器等待的确认时返回 True"""
+        if not self.require_ack or can_id != self.can_id or not is_cal_ack(data, length):
+            return False
+        index = data[1]
+        if index >= len(self.frames) or self.state[index] != CalPointState.SENT:
+            return False
+        if list(data[2:8]) != self.frames[index][2:8]:
+            return False
+        self._in_flight.remove(index)
+        self._ack(index)
+        return True
+
+    def _ack(self, index: int):
+        self.state[index] = CalPointState.ACKED
+        self.acked_count += 1
+
+
+def _send(writer: CalTableWriter, index: int, data, send, now: float) -> bool:
+    """写入一帧并更新写入器状态，写入驱动成功时返回 True"""
+    result = send(writer.can_id, data)
+    if result == pCANBasic.PCAN_ERROR_OK:
+        writer.on_sent(index, now)
+        return True
+    if not (isinstance(result, int) and result & pCANBasic.PCAN_ERROR_QXMTFULL):
+        writer.on_send_error(index, now)
+    return False
+
+
+def pump(writer: CalTableWriter, send, now: float, max_frames: int = 64) -> int:
+    """
+    发送写入器当前可发送的帧，返回成功写入驱动的帧数
+
+    send(can_id, data) 返回 TPCANStatus；驱动发送队列满（PCAN_ERROR_QXMTFULL）或写入出错时停止，下次再试。
+    """
+    count = 0
+    while count < max_frames:
+        frame = writer.next_frame(now)
+        if frame is None or not _send(writer, *frame, send, now):
+            break
+        count += 1
+    return count
+
+
+class CalWriteScheduler:
+    """
+    多传感器标定表并发写入
+
+    每轮从每个未完成的写入器各取一帧，交错发送到共享通道，
+    各传感器的确认等待相互重叠，写入 N 个传感器的时间接近写入一个传感器。
+    """
+
+    def __init__(self, writers=(), max_in_flight=64):
+        """
+        writers         CalTableWriter 列表，每个传感器一个，CanId 不能重复
+        max_in_flight   所有传感器未确认帧的总数上限，超时重发不受限制
+        """
+        self.max_in_flight = max_in_flight
+        self.writers = {}  # can_id -> CalTableWriter，按加入顺序轮询
+        self._next = 0
+        for writer in writers:
+            self.add(writer)
+
+    def add(self, writer: CalTableWriter):
+        if writer.can_id in self.writers:
+            raise ValueError("duplicate CAN id %d" % writer.can_id)
+        self.writers[writer.can_id] = writer
+
+    def __len__(self):
+        return len(self.writers)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(writer.in_flight for writer in self.writers.values())
+
+    @property
+    def done(self) -> bool:
+        return all(writer.done for writer in self.writers.values())
+
+    @property
+    def failed(self) -> bool:
+        return any(writer.failed for writer in self.writers.values())
+
+    @property
+    def failed_ids(self):
+        return [can_id for can_id, writer in self.writers.items() if writer.failed]
+
+    @property
+    def done_ids(self):
+        return [can_id for can_id, writer in self.writers.items() if writer.done and not writer.failed]
+
+    @property
+    def progress(self) -> float:
+        total = sum(len(writer) for writer in self.writers.values())
+        if total == 0:
+            return 1.0
+        return sum(writer.acked_count for writer in self.writers.values()) / total
+
+    def on_reply(self, can_id: int, data, length: int) -> bool:
+        writer = self.writers.get(can_id)
+        return writer is not None and writer.on_reply(can_id, data, length)
+
+    def pump(self, send, now: float, max_frames: int = 64) -> int:
+        """按轮询顺序发送各写入器当前可发送的帧，返回成功写入驱动的帧数，send 同 pump"""
+        writers = list(self.writers.values())
+        if not writers:
+            return 0
+        in_flight = self.in_flight
+        count = 0
+        idle = 0  # 连续没有帧可发送的写入器数量，转完一圈即停止
+        while count < max_frames and idle < len(writers):
+            writer = writers[self._next % len(writers)]
+            self._next += 1
+            frame = writer.next_frame(now, allow_new=in_flight < self.max_in_flight)
+            if frame is None:
+                idle += 1
+                continue
+            before = writer.in_flight
+            if not _send(writer, *frame, send, now):
+                break
+            in_flight += writer.in_flight - before
+            count += 1
+            idle = 0
+        return count
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+AD 值到物理值的分段线性标定曲线
+"""
+import bisect
+
+import numpy as np
+
+from .calTable import CalTable
+
+
+class CalibrationCurve:
+    """
+    由标定表预先计算的分段线性曲线
+
+    断点按 adValue 排序，第 i 段（a[i-1], a[i]）的斜率与截距保存在 slopes[i] / intercepts[i]。
+    与原 check_data_base 的结果一致：
+      - 大于最大断点：无结果（None，界面显示 Error）
+      - 等于某个断点：返回该断点的 rangeValue
+      - 小于最小断点：沿第一个与最后一个断点的连线外推（slopes[0]），只有一个断点时无结果
+    """
+    __slots__ = ("ad_values", "range_values", "slopes", "intercepts", "size",
+                 "_ad_array", "_range_array", "_slope_array", "_intercept_array")
+
+    def __init__(self, ad_values, range_values):
+        points = sorted(zip(ad_values, range_values), key=lambda x: x[0])
+        self.ad_values = [p[0] for p in points]
+        self.range_values = [p[1] for p in points]
+        self.size = len(points)
+        self.slopes = [None] * self.size
+        self.intercepts = [None] * self.size
+
+        if self.size == 0:
+            self._ad_array = np.zeros(0, dtype=np.int64)
+            self._range_array = self._slope_array = self._intercept_array = np.zeros(0, dtype=np.float64)
+            return
+        a, r = self.ad_values, self.range_values
+        if a[-1] != a[0]:
+            m = (r[-1] - r[0]) / (a[-1] - a[0])
+            self.slopes[0], self.intercepts[0] = m, r[0] - m * a[0]
+        for i in range(1, self.size):
+            if a[i] == a[i - 1]:
+                continue
+            # y = m*x+b
+            m = (r[i - 1] - r[i]) / (a[i - 1] - a[i])
+            self.slopes[i], self.intercepts[i] = m, r[i] - m * a[i]
+
+        # 批量换算使用的数组，无结果的段为 NaN
+        self._ad_array = np.array(self.ad_values, dtype=np.int64)
+        self._range_array = np.array(self.range_values, dtype=np.float64)
+        self._slope_array = np.array([np.nan if m is None else m for m in self.slopes], dtype=np.float64)
+        self._intercept_array = np.array([np.nan if b is None else b for b in self.intercepts], dtype=np.float64)
+
+    @classmethod
+    def from_table(cls, table: CalTable):
+        return cls(table.ad_values, table.range_values)
+
+    def evaluate(self, value):
+        """计算 AD 值对应的物理值，断点处返回 int，插值返回 float，无结果返回 None"""
+        i = bisect.bisect_left(self.ad_values, value)
+        if i == self.size:
+            return None
+        if self.ad_values[i] == value:
+            return self.range_values[i]
+        slope = self.slopes[i]
+        if slope is None:
+            return None
+        return slope * value + self.intercepts[i]
+
+    def evaluate_array(self, values, out=None):
+        """
+        批量计算 AD 值数组对应的物理值，结果为 float64 数组，无结果处为 NaN
+
+        与 evaluate 逐个计算的结果一致，可用于接收线程的一批帧或离线回放的整段记录。
+        """
+        values = np.asarray(values)
+        if out is None:
+            out = np.empty(values.shape, dtype=np.float64)
+        out.fill(np.nan)
+        if self.size == 0 or values.size == 0:
+            return out
+
+        index = np.searchsorted(self._ad_array, values, side="left")
+        inside = index < self.size
+        index = np.minimum(index, self.size - 1)
+        exact = inside & (self._ad_array[index] == values)
+        between = inside & ~exact
+
+        segment = index[between]
+        out[between] = self._slope_array[segment] * values[between] + self._intercept_array[segment]
+        out[exact] = self._range_array[index[exact]]
+        return out
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+命令行标定工具，不导入 Qt
+
+每条命令连接通道、执行、断开，结果以一行 JSON 输出到标准输出，退出码：
+  0  成功
+  1  操作失败（未扫描到传感器、标定写入失败等）
+  2  参数错误
+  3  驱动或通道错误
+
+示例：
+  python HTCli.py scan
+  python HTCli.py acquire --id 5 --duration 1
+  python HTCli.py acquire --id 5 --samples 200
+  python HTCli.py write --id 5 压力传感器校准数据.json
+  python HTCli.py write --dir ./tables
+  PCAN_BACKEND=virtual PCAN_VIRTUAL_SENSORS=1-8 python HTCli.py scan
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from . import pCANBasic
+from .calTable import CalTable
+from .idDiscovery import IdDiscovery
+from .protocol import Command
+from .session import BROADCAST_ID, CanSession, CanSessionError, parse_bitrate
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_DRIVER = 3
+
+
+def emit(result: dict):
+    print(json.dumps(result, ensure_ascii=False), flush=True)
+
+
+def parse_int(text: str) -> int:
+    return int(text, 0)
+
+
+def target_id(args) -> int:
+    return BROADCAST_ID if args.broadcast else args.id
+
+
+def load_table(path: str):
+    return CalTable.load(path).points()
+
+
+def cmd_connect(session: CanSession, args):
+    status, value = session.drv.GetValue(session.channel, pCANBasic.PCAN_CHANNEL_CONDITION)
+    return EXIT_OK, {"channel": "0x%X" % session.channel.value,
+                     "condition": value if status == pCANBasic.PCAN_ERROR_OK else None}
+
+
+def cmd_scan(session: CanSession, args):
+    discovery = session.scan(IdDiscovery(quiet_intervals=args.quiet_intervals, max_duration=args.max_duration))
+    ids = discovery.ids
+    result = {"ids": ids,
+              "elapsed_ms": round((time.monotonic() - discovery.start_time) * 1000),
+              "latency_ms": {str(i): round(t * 1000, 1) for i, t in discovery.latency.items()},
+              "interval_ms": {str(i): round(discovery.interval(i) * 1000, 2)
+                              for i in ids if discovery.interval(i) is not None}}
+    return (EXIT_OK if ids else EXIT_FAILURE), result
+
+
+def cmd_stream(session: CanSession, args):
+    """按 rate 输出 JSON 行，直到 duration 秒后（0 为一直输出，Ctrl+C 结束）"""
+    if args.values:
+        session.command(target_id(args), [Command.Switch, 0x00])
+    else:
+        session.command(target_id(args), [Command.Switch, 0x01])
+    if args.cal:
+        from .calibration import CalibrationCurve
+        session.sensor_state.default_curve = CalibrationCurve(*zip(*load_table(args.cal)))
+
+    state = session.sensor_state
+    period = 1.0 / args.rate
+    end = time.monotonic() + args.duration if args.duration > 0 else None
+    lines = 0
+    try:
+        while end is None or time.monotonic() < end:
+            session.run(period)
+            ids = [args.id] if args.id is not None and not args.broadcast else state.seen_ids().tolist()
+            for can_id in ids:
+                if not state.frame_count[can_id]:
+                    continue
+                value = float(state.sensor_value[can_id])
+                emit({"t": round(time.time(), 3), "id": can_id, "ad": int(state.ad_value[can_id]),
+                      "value": None if value != value else value, "frames": int(state.frame_count[can_id])})
+                lines += 1
+    except KeyboardInterrupt:
+        pass
+    return EXIT_OK, {"lines": lines}
+
+
+def cmd_acquire(session: CanSession, args):
+    overruns, frames_lost = session.metrics.overruns, session.metrics.frames_lost
+    stats = session.acquire(args.id, args.duration, args.samples)
+    if stats["count"] == 0:
+        return EXIT_FAILURE, {"id": args.id, "samples": 0, "error": "no data"}
+    result = {"id": args.id, "samples": stats["count"], "ad_value": int(round(stats["mean"])),
+              "mean": round(stats["mean"], 2), "std": round(stats["std"], 2),
+              "min": stats["min"], "max": stats["max"],
+              "overruns": session.metrics.overruns - overruns,
+              "frames_lost": session.metrics.frames_lost - frames_lost}
+    if args.samples is not None and args.duration is None and stats["count"] < args.samples:
+        result["error"] = "timeout after %d of %d samples" % (stats["count"], args.samples)
+        return EXIT_FAILURE, result
+    if result["overruns"] or result["frames_lost"]:
+        # 丢帧时采集值不可信，不作为标定点
+        result["error"] = "frames lost during acquisition"
+        return EXIT_FAILURE, result
+    return EXIT_OK, result
+
+
+def cmd_write(session: CanSession, args):
+    if args.dir:
+        tables = {}
+        for name in sorted(os.listdir(args.dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() == ".json" and stem.isdigit() and 0 < int(stem) < BROADCAST_ID:
+                tables[int(stem)] = load_table(os.path.join(args.dir, name))
+        if not tables:
+            return EXIT_FAILURE, {"error": "no <CAN ID>.json calibration file in %s" % args.dir}
+    elif args.file and (args.id is not None or args.broadcast):
+        tables = {target_id(args): load_table(args.file)}
+    else:
+        raise SystemExit("write needs FILE with --id/--broadcast, or --dir")
+
+    require_ack = args.ack and not args.broadcast
+    scheduler = session.write_tables(tables, require_ack=require_ack, timeout=args.timeout)
+    sensors = {str(can_id): {"points": len(writer), "acked": writer.acked_count,
+                             "retransmits": writer.retransmits,
+                             "ok": writer.done and not writer.failed,
+                             "failed_points": writer.failed_indices}
+               for can_id, writer in scheduler.writers.items()}
+    ok = scheduler.done and not scheduler.failed
+    return (EXIT_OK if ok else EXIT_FAILURE), {"sensors": sensors, "failed_ids": scheduler.failed_ids}
+
+
+def cmd_save(session: CanSession, args):
+    session.command(target_id(args), [Command.Save])
+    return EXIT_OK, {"id": target_id(args)}
+
+
+def cmd_reset(session: CanSession, args):
+    session.command(target_id(args), [Command.Reset])
+    return EXIT_OK, {"id": target_id(args)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="HTCli", description="Pressure sensor calibration without GUI")
+    parser.add_argument("--channel", type=parse_int, default=pCANBasic.PCAN_USBBUS1.value,
+                        help="PCAN channel handle, default 0x51 (PCAN_USBBUS1)")
+    parser.add_argument("--bitrate", default="500K", help="5K .. 1M, default 500K")
+    parser.add_argument("--backend", choices=[pCANBasic.PCAN_BACKEND_NATIVE, pCANBasic.PCAN_BACKEND_VIRTUAL],
+                        help="driver backend, default from %s" % pCANBasic.PCAN_BACKEND_ENV)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def target(p, required=True):
+        group = p.add_mutually_exclusive_group(required=required)
+        group.add_argument("--id", type=parse_int, help="sensor CAN ID")
+        group.add_argument("--broadcast", action="store_true", help="all sensors (0xFF)")
+
+    sub.add_parser("connect", help="open the channel and report its condition").set_defaults(func=cmd_connect)
+
+    p = sub.add_parser("scan", help="discover sensor CAN IDs")
+    p.add_argument("--quiet-intervals", type=float, default=5)
+    p.add_argument("--max-duration", type=float, default=10.0)
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("stream", help="print live values as JSON lines")
+    target(p, required=False)
+    p.add_argument("--duration", type=float, default=0, help="seconds, 0 = until interrupted")
+    p.add_argument("--rate", type=float, default=10, help="lines per second per sensor")
+    p.add_argument("--values", action="store_true", help="ask sensors to report physical values")
+    p.add_argument("--cal", help="calibration JSON used to convert AD values")
+    p.set_defaults(func=cmd_stream)
+
+    p = sub.add_parser("acquire", help="average the AD value of one sensor")
+    p.add_argument("--id", type=parse_int, required=True)
+    p.add_argument("--duration", type=float, help="seconds, default 0.5 unless --samples is given")
+    p.add_argument("--samples", type=int, help="stop after this many frames")
+    p.set_defaults(func=cmd_acquire)
+
+    p = sub.add_parser("write", help="write a calibration table (Cal + Switch 0x02)")
+    target(p, required=False)
+    p.add_argument("file", nargs="?", help="calibration JSON")
+    p.add_argument("--dir", help="directory of <CAN ID>.json files, written concurrently")
+    p.add_argument("--ack", action="store_true",
+                   help="wait for each Cal frame to be echoed (firmware with Cal acknowledgements only)")
+    p.add_argument("--timeout", type=float, default=30.0)
+    p.set_defaults(func=cmd_write)
+
+    p = sub.add_parser("save", help="send Save")
+    target(p)
+    p.set_defaults(func=cmd_save)
+
+    p = sub.add_parser("reset", help="send Reset (factory recovery)")
+    target(p)
+    p.set_defaults(func=cmd_reset)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        bitrate = parse_bitrate(args.bitrate)
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = {"command": args.command}
+    try:
+        session = CanSession(pCANBasic.PCANBasic(args.backend), pCANBasic.TPCANHandle(args.channel), bitrate)
+        with session:
+            code, data = args.func(session, args)
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            parser.error(e.code)
+        raise
+    except CanSessionError as e:
+        code, data = EXIT_DRIVER, {"error": str(e), "status": e.status}
+    except (OSError, ValueError) as e:
+        code, data = EXIT_FAILURE, {"error": str(e)}
+    except Exception as e:  # 驱动库加载失败等
+        code, data = EXIT_DRIVER, {"error": str(e)}
+    result["ok"] = code == EXIT_OK
+    result.update(data)
+    emit(result)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
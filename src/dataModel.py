@@ -15,6 +15,20 @@ class SensorCalParamList(BaseModel):
         self.sensorCalParam.sort(key=lambda x: x.adValue)
 
 
+class SensorRecord(BaseModel):
+    canId: int
+    channel: int = 0
+    bitrate: int = 0
+    reportInterval: float = 0.0  # 上报间隔（秒）
+    lastSeen: float = 0.0  # 最后一次扫描到的时间（time.time()）
+    calFile: str = ""  # 最后加载的标定文件
+    missedScans: int = 0  # 连续未扫描到的次数
+
+
+class SensorRegistryData(BaseModel):
+    sensors: List[SensorRecord] = []
+
+
 if __name__ == '__main__':
     params = SensorCalParamList()
     params.sensorCalParam.append(SensorCalParam(adValue=300, rangeValue=10))
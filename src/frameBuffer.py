@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+接收帧环形缓冲区
+
+所有接收到的帧统一保存为 FRAME_DTYPE 结构化数组（id, msgtype, len, data[8], timestamp 微秒），
+接收线程整批写入，解码、记录、绘图等下游以帧序号区间 [start, end) 读取零拷贝视图。
+"""
+from ctypes import sizeof
+
+import numpy as np
+
+from .pCANBasic import TPCANMsg, TPCANTimestamp
+
+FRAME_DTYPE = np.dtype([
+    ("id", "<u4"),
+    ("msgtype", "u1"),
+    ("len", "u1"),
+    ("data", "u1", (8,)),
+    ("timestamp", "<u8"),  # 微秒，micros + 1000 * millis + 0x100000000 * 1000 * millis_overflow
+], align=True)
+
+# 与 ctypes 结构体内存布局一致，用于从 ReadBatch 的数组零拷贝读取
+PCAN_MSG_DTYPE = np.dtype({
+    "names": ["ID", "MSGTYPE", "LEN", "DATA"],
+    "formats": ["<u4", "u1", "u1", ("u1", (8,))],
+    "offsets": [TPCANMsg.ID.offset, TPCANMsg.MSGTYPE.offset, TPCANMsg.LEN.offset, TPCANMsg.DATA.offset],
+    "itemsize": sizeof(TPCANMsg),
+})
+PCAN_TIMESTAMP_DTYPE = np.dtype({
+    "names": ["millis", "millis_overflow", "micros"],
+    "formats": ["<u4", "<u2", "<u2"],
+    "offsets": [TPCANTimestamp.millis.offset, TPCANTimestamp.millis_overflow.offset, TPCANTimestamp.micros.offset],
+    "itemsize": sizeof(TPCANTimestamp),
+})
+
+
+def timestamp_to_us(millis, millis_overflow, micros):
+    """TPCANTimestamp 转换为总微秒数，支持标量与数组"""
+    millis = np.asarray(millis, dtype=np.uint64)
+    return (np.asarray(micros, dtype=np.uint64) + np.uint64(1000) * millis
+            + np.uint64(0x100000000 * 1000) * np.asarray(millis_overflow, dtype=np.uint64))
+
+
+class FrameRingBuffer:
+    """
+    固定容量的帧环形缓冲区
+
+    head 为累计写入的帧数（帧序号），帧 n 保存在 frames[n % capacity]。
+    单个写线程；读者保存自己的序号，落后超过 capacity 的帧已被覆盖，由 segments 跳过。
+    写线程先把 claimed 推进到本次写入的结束序号再写入槽位，写完后推进 head；
+    其他线程读取用 snapshot，读取后按 claimed 丢弃读取期间可能被覆盖的帧。
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        self.capacity = capacity
+        self.frames = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.head = 0
+        self.claimed = 0  # 已开始写入的帧序号上界，帧 n < claimed - capacity 的槽位可能正在被覆盖
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    def push_batch(self, msgs, timestamps, count: int) -> int:
+        """写入 ReadBatch 返回的 ctypes 数组中前 count 帧，返回写入后的 head"""
+        if count <= 0:
+            return self.head
+        self.claimed = self.head + count
+        src_msgs = np.frombuffer(msgs, dtype=PCAN_MSG_DTYPE, count=count)
+        src_ts = np.frombuffer(timestamps, dtype=PCAN_TIMESTAMP_DTYPE, count=count)
+        if count > self.capacity:
+            self.head += count - self.capacity
+            src_msgs = src_msgs[-self.capacity:]
+            src_ts = src_ts[-self.capacity:]
+            count = self.capacity
+
+        pos = self.head % self.capacity
+        first = min(count, self.capacity - pos)
+        for dst, begin, end in ((self.frames[pos:pos + first], 0, first),
+                                (self.frames[:count - first], first, count)):
+            if begin == end:
+                continue
+            m = src_msgs[begin:end]
+            t = src_ts[begin:end]
+            dst["id"] = m["ID"]
+            dst["msgtype"] = m["MSGTYPE"]
+            dst["len"] = m["LEN"]
+            dst["data"] = m["DATA"]
+            dst["timestamp"] = timestamp_to_us(t["millis"], t["millis_overflow"], t["micros"])
+        self.head += count
+        return self.head
+
+    def push_frames(self, frames: np.ndarray) -> int:
+        """写入 FRAME_DTYPE 数组（回放、测试等），返回写入后的 head"""
+        count = len(frames)
+        if count == 0:
+            return self.head
+        self.claimed = self.head + count
+        if count > self.capacity:
+            self.head += count - self.capacity
+            frames = frames[-self.capacity:]
+            count = self.capacity
+        pos = self.head % self.capacity
+        first = min(count, self.capacity - pos)
+        self.frames[pos:pos + first] = frames[:first]
+        if first < count:
+            self.frames[:count - first] = frames[first:]
+        self.head += count
+        return self.head
+
+    def push(self, can_id: int, data, timestamp_us: int, msgtype: int = 0) -> int:
+        self.claimed = self.head + 1
+        frame = self.frames[self.head % self.capacity]
+        frame["id"] = can_id
+        frame["msgtype"] = msgtype
+        frame["len"] = len(data)
+        frame["data"] = np.frombuffer(bytes(data).ljust(8, b"\0")[:8], dtype=np.uint8)
+        frame["timestamp"] = timestamp_us
+        self.head += 1
+        return self.head
+
+    def oldest(self) -> int:
+        """仍保存在缓冲区中的最早帧序号"""
+        return max(0, self.head - self.capacity)
+
+    def segments(self, start: int, end: int = None):
+        """
+        返回帧序号 [start, end) 的零拷贝视图列表（环绕时为两段）
+
+        已被覆盖的帧会被跳过，可用 lost(start) 得到跳过的帧数。
+        """
+        if end is None:
+            end = self.head
+        start = max(start, self.oldest())
+        if end <= start:
+            return []
+        pos = start % self.capacity
+        count = end - start
+        first = min(count, self.capacity - pos)
+        if first == count:
+            return [self.frames[pos:pos + count]]
+        return [self.frames[pos:], self.frames[:count - first]]
+
+    def view(self, start: int, end: int = None) -> np.ndarray:
+        """帧序号 [start, end) 的连续数组，不环绕时为视图，环绕时为拷贝"""
+        parts = self.segments(start, end)
+        if not parts:
+            return self.frames[:0]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def snapshot(self, start: int, end: int = None):
+        """
+        帧序号 [start, end) 的拷贝，返回 (frames, lost)，供写线程以外的线程读取
+
+        lost 为跳过的帧数：读取前已被覆盖的帧，以及读取期间写线程可能正在覆盖的帧（按 claimed 判断）
+        """
+        if end is None:
+            end = self.head
+        first = max(start, self.oldest())
+        parts = self.segments(first, end)
+        frames = np.concatenate(parts) if parts else self.frames[:0].copy()
+        # 拷贝期间写线程可能已开始覆盖开头的槽位，这些帧可能不完整，丢弃
+        safe = max(first, self.claimed - self.capacity)
+        if safe > first:
+            frames = frames[min(safe, end) - first:]
+        return frames, max(0, min(safe, end) - start)
+
+    def lost(self, start: int) -> int:
+        """从 start 开始读取时已被覆盖的帧数"""
+        return max(0, self.oldest() - start)
+
+    def latest(self, count: int) -> np.ndarray:
+        return self.view(max(self.head - count, 0))
+
+
+class ReadBatchSizer:
+    """
+    按积压调整每次 ReadBatch 读取的帧数
+
+    一次读空队列中有 ReadBatch 读满时加倍，读取的总帧数不足四分之一时减半，
+    在 [minimum, maximum] 之间。驱动的批量缓冲区只增不减，缩小不会重新分配。
+    """
+    minimum = 64
+    maximum = 4096
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def update(self, drained: int, saturated: bool) -> int:
+        """drained 为本次读空队列的总帧数，saturated 表示有 ReadBatch 读满，返回新的帧数"""
+        if saturated:
+            self.size = min(self.size * 2, self.maximum)
+        elif drained < self.size // 4:
+            self.size = max(self.size // 2, self.minimum)
+        return self.size
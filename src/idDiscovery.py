@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+传感器 CanId 自适应扫描
+
+根据已发现传感器的上报间隔决定扫描何时结束：最慢传感器的 quiet_intervals 个上报间隔内
+没有出现新 ID 即结束，不再固定等待。尚未出现的传感器可能以可设置的最长间隔（max_report_interval）上报，
+因此静默时间与最短扫描时间都不少于 quiet_intervals 个该间隔。时间由调用方传入（秒，单调时钟），不依赖 Qt。
+"""
+
+
+class IdDiscovery:
+    def __init__(self, quiet_intervals=5, default_interval=0.1, min_duration=None, max_duration=10.0,
+                 empty_timeout=2.0, max_report_interval=0.2):
+        """
+        quiet_intervals      没有新 ID 出现的上报间隔数，达到后结束扫描
+        default_interval     尚未估计出上报间隔时使用的间隔（秒）
+        min_duration         最短扫描时间（秒），为空时为 quiet_intervals * max_report_interval
+        max_report_interval  传感器可设置的最长上报间隔（秒，Command.Freq 最大 200ms）
+        max_duration         最长扫描时间（秒），大量低频传感器时也不会超过
+        empty_timeout        一直没有任何传感器上报时的结束时间（秒）
+        """
+        self.quiet_intervals = quiet_intervals
+        self.default_interval = default_interval
+        self.max_report_interval = max_report_interval
+        self.min_duration = quiet_intervals * max_report_interval if min_duration is None else min_duration
+        self.max_duration = max_duration
+        self.empty_timeout = empty_timeout
+        self.start(0.0)
+
+    def start(self, now: float):
+        self.start_time = now
+        self.last_new_time = now
+        self.first_seen = {}  # can_id -> 首次出现时间
+        self.first_count = {}  # can_id -> 首次出现时的累计帧数
+        self.frame_count = {}  # can_id -> 累计帧数
+        self.last_seen = {}  # can_id -> 最后出现时间
+
+    @property
+    def ids(self):
+        """按发现顺序排列的 CanId"""
+        return list(self.first_seen)
+
+    @property
+    def latency(self):
+        """每个 CanId 从开始扫描到首次出现的时间（秒）"""
+        return {can_id: t - self.start_time for can_id, t in self.first_seen.items()}
+
+    def observe(self, can_ids, now: float, frame_counts=None):
+        """
+        记录一批上报帧中出现的 CanId，返回新发现的 CanId 列表
+
+        frame_counts 为这些 CanId 的累计帧数（如 SensorStateTable.frame_count），
+        为空时每次出现计为一帧
+        """
+        new_ids = []
+        for i, can_id in enumerate(can_ids):
+            can_id = int(can_id)
+            count = int(frame_counts[i]) if frame_counts is not None else self.frame_count.get(can_id, 0) + 1
+            if can_id not in self.first_seen:
+                self.first_seen[can_id] = now
+                self.first_count[can_id] = count
+                new_ids.append(can_id)
+            self.frame_count[can_id] = count
+            self.last_seen[can_id] = now
+        if new_ids:
+            self.last_new_time = now
+        return new_ids
+
+    def interval(self, can_id: int):
+        """估计的上报间隔（秒），帧数不足时返回 None"""
+        frames = self.frame_count[can_id] - self.first_count[can_id]
+        if frames <= 0:
+            return None
+        return (self.last_seen[can_id] - self.first_seen[can_id]) / frames
+
+    def report_interval(self) -> float:
+        """最慢传感器的上报间隔，决定扫描的静默时间"""
+        intervals = [self.interval(can_id) for can_id in self.first_seen]
+        intervals = [i for i in intervals if i is not None]
+        return max(intervals) if intervals else self.default_interval
+
+    def deadline(self) -> float:
+        """按当前观测估计的结束时间"""
+        if not self.first_seen:
+            end = self.start_time + self.empty_timeout
+        else:
+            # 已发现传感器的间隔不代表尚未出现的传感器，静默时间按可设置的最长间隔计
+            interval = max(self.report_interval(), self.max_report_interval)
+            end = self.last_new_time + self.quiet_intervals * interval
+        end = max(end, self.start_time + self.min_duration)
+        return min(end, self.start_time + self.max_duration)
+
+    def finished(self, now: float) -> bool:
+        return now >= self.deadline()
+
+    def progress(self, now: float) -> float:
+        total = self.deadline() - self.start_time
+        if total <= 0:
+            return 1.0
+        return min(1.0, (now - self.start_time) / total)
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+接收管线运行指标
+
+分别统计驱动读取（接收线程）和界面处理（主线程）两段，用于区分总线、驱动、Python 与界面瓶颈：
+  frames_read       ReadBatch 读取的帧数
+  batch_sizes       每次 readMsg 读空队列得到的帧数（按 2 的幂分桶）
+  overruns          驱动报告 PCAN_ERROR_QOVERRUN 的次数（接收队列溢出，帧已丢失）
+  frames_kept       通过 0x700 检查并分发的帧数，frames_discarded 为其余帧
+  frames_lost       界面处理不及时、在环形缓冲区中被覆盖的帧数
+  dispatch_delay    readMsg 读取完成到界面处理的时间（同一时钟，绝对值）
+  delivery_latency  帧时间戳（TPCANTimestamp）到界面处理的时间
+  latency_by_id     按 CanId 的 delivery_latency 直方图（LatencyHistogram）
+  interval_by_id    按 CanId 的相邻两帧时间戳间隔直方图，用于核对 Command.Freq 设置的上报间隔
+
+驱动时间戳与主机时钟的基准不同，delivery_latency 以观测到的最小差值为零点，
+即相对最快一次送达的额外延迟；虚拟驱动使用主机时钟，两者一致。
+
+界面每次通常只处理几帧，on_delivered 先把帧存入列表，攒够 PENDING_FRAMES 帧（或读取统计时）再整批累加，
+每帧开销与帧数成正比，不随直方图大小增长。
+"""
+import json
+import time
+
+import numpy as np
+
+from . import pCANBasic
+
+BATCH_BUCKETS = 16  # batch_sizes[i]：帧数在 [2^(i-1), 2^i) 的次数，batch_sizes[0] 为 0 帧
+MAX_IDS = 256
+PENDING_FRAMES = 256  # on_delivered 攒够这么多帧后整批累加到延迟与间隔统计
+# 直方图桶上界（微秒），最后一个桶为溢出桶
+HISTOGRAM_EDGES_US = np.array([100, 200, 500, 1000, 2000, 3000, 4000, 5000, 7500, 10000, 12500, 15000,
+                               20000, 30000, 50000, 100000, 200000, 500000, 1000000], dtype=np.int64)
+
+
+def now_us() -> int:
+    """主机单调时钟（微秒），与 readMsg 记录的读取时间同基准"""
+    return time.monotonic_ns() // 1000
+
+
+class RunningStats:
+    """计数、均值、最大值，window_* 为上次 take_window 之后的统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.window_count = 0
+        self.window_total = 0.0
+        self.window_max = 0.0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        total, peak = float(values.sum()), float(values.max())
+        self.count += values.size
+        self.total += total
+        self.max = max(self.max, peak)
+        self.window_count += values.size
+        self.window_total += total
+        self.window_max = max(self.window_max, peak)
+
+    def add_value(self, value):
+        """累加单个值，不经过数组"""
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.window_count += 1
+        self.window_total += value
+        self.window_max = max(self.window_max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def take_window(self):
+        """返回 (均值, 最大值) 并开始新的窗口"""
+        result = (self.window_total / self.window_count if self.window_count else 0.0, self.window_max)
+        self.window_count = 0
+        self.window_total = 0.0
+        self.window_max = 0.0
+        return result
+
+    def to_dict(self, scale=1.0):
+        return {"count": self.count, "mean": self.mean * scale, "max": self.max * scale}
+
+
+class LatencyHistogram:
+    """
+    按 CanId 的固定分桶直方图（微秒）
+
+    counts[id, i] 为落在 (edges[i-1], edges[i]] 的次数，最后一列为超过 edges[-1] 的次数。
+    add 整批计算桶序号后用 np.add.at 累加，开销与帧数成正比。
+    分位数取所在桶的上界（不超过最大值），精度为桶宽。
+    """
+
+    def __init__(self, edges=HISTOGRAM_EDGES_US, max_ids=MAX_IDS):
+        self.edges = np.asarray(edges, dtype=np.int64)
+        self.buckets = len(self.edges) + 1
+        self.counts = np.zeros((max_ids, self.buckets), dtype=np.int64)
+        self.max = np.zeros(max_ids, dtype=np.int64)
+
+    def reset(self):
+        self.counts.fill(0)
+        self.max.fill(0)
+
+    def add(self, can_ids, values_us):
+        if len(can_ids) == 0:
+            return
+        can_ids = np.asarray(can_ids, dtype=np.intp)
+        values_us = np.asarray(values_us, dtype=np.int64)
+        index = can_ids * self.buckets + np.searchsorted(self.edges, values_us)
+        np.add.at(self.counts.reshape(-1), index, 1)
+        np.maximum.at(self.max, can_ids, values_us)
+
+    def ids(self) -> np.ndarray:
+        return np.flatnonzero(self.counts.any(axis=1))
+
+    def count(self, can_id: int) -> int:
+        return int(self.counts[can_id].sum())
+
+    def percentile(self, can_id: int, q: float) -> int:
+        """q 分位（0-100）所在桶的上界（微秒），无数据时为 0"""
+        cumulative = np.cumsum(self.counts[can_id])
+        if cumulative[-1] == 0:
+            return 0
+        i = int(np.searchsorted(cumulative, cumulative[-1] * q / 100.0))
+        peak = int(self.max[can_id])
+        return min(int(self.edges[i]), peak) if i < len(self.edges) else peak
+
+    def summary(self, can_id: int, scale=1e-3) -> dict:
+        """count、p50、p99、max，默认换算为毫秒"""
+        return {"count": self.count(can_id),
+                "p50": self.percentile(can_id, 50) * scale,
+                "p99": self.percentile(can_id, 99) * scale,
+                "max": int(self.max[can_id]) * scale}
+
+    def to_dict(self, scale=1e-3) -> dict:
+        """导出为 {"edges_ms": [...], "ids": {id: {count, p50, p99, max, buckets}}}"""
+        result = {}
+        for can_id in self.ids().tolist():
+            item = self.summary(can_id, scale)
+            item["buckets"] = self.counts[can_id].tolist()
+            result[str(can_id)] = item
+        return {"edges_ms": (self.edges * scale).tolist(), "ids": result}
+
+
+class PipelineMetrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.start_time = time.monotonic()
+        self.frames_read = 0
+        self.reads = 0  # readMsg 调用次数
+        self.batch_sizes = [0] * BATCH_BUCKETS
+        self.max_batch = 0
+        self.overruns = 0
+        self.frames_kept = 0
+        self.frames_discarded = 0
+        self.frames_lost = 0
+        self.deliveries = 0  # 界面处理的批次数
+        self.dispatch_delay = RunningStats()  # 微秒
+        self._delivery_latency = RunningStats()  # 微秒
+        self._latency_by_id = LatencyHistogram()
+        self._interval_by_id = LatencyHistogram()
+        self._pending_offsets = []  # 尚未累加的帧：主机时钟 - 帧时间戳
+        self._pending_stamps = []
+        self._pending_ids = []
+        self._last_timestamp = np.zeros(MAX_IDS, dtype=np.int64)  # 每个 CanId 上一帧的时间戳，0 为未收到
+        self._clock_offset = None  # 主机时钟 - 帧时间戳的最小值
+        self._window_time = self.start_time
+        self._window_frames = 0
+
+    # 接收线程
+    def on_read_status(self, status):
+        """每次 ReadBatch 的返回状态"""
+        if isinstance(status, int) and status & pCANBasic.PCAN_ERROR_QOVERRUN:
+            self.overruns += 1
+
+    def on_drain(self, count: int):
+        """一次 readMsg 读空队列得到的帧数"""
+        self.reads += 1
+        self.frames_read += count
+        self.max_batch = max(self.max_batch, count)
+        self.batch_sizes[min(int(count).bit_length(), BATCH_BUCKETS - 1)] += 1
+
+    # 界面线程
+    def on_lost(self, count: int):
+        self.frames_lost += count
+
+    def on_delivered(self, kept: int, discarded: int, timestamps_us, read_us: int = None, can_ids=None):
+        """
+        界面处理一批帧
+
+        timestamps_us 为分发帧的时间戳，read_us 为 readMsg 读取完成时的 now_us()，
+        can_ids 与 timestamps_us 一一对应，给出时记录按 CanId 的延迟与上报间隔直方图；
+        少于 PENDING_FRAMES 帧时先暂存，由 flush 整批累加
+        """
+        now = now_us()
+        self.deliveries += 1
+        self.frames_kept += kept
+        self.frames_discarded += discarded
+        if read_us is not None:
+            self.dispatch_delay.add_value(now - read_us)
+        count = len(timestamps_us)
+        if count == 0:
+            return
+        if can_ids is None or count >= PENDING_FRAMES:
+            self.flush()
+            self._add_frames(now - np.asarray(timestamps_us, dtype=np.int64), can_ids, timestamps_us)
+            return
+        stamps = timestamps_us.tolist() if isinstance(timestamps_us, np.ndarray) else list(timestamps_us)
+        self._pending_offsets.extend([now - stamp for stamp in stamps])
+        self._pending_stamps.extend(stamps)
+        self._pending_ids.extend(can_ids.tolist() if isinstance(can_ids, np.ndarray) else can_ids)
+        if len(self._pending_stamps) >= PENDING_FRAMES:
+            self.flush()
+
+    def flush(self):
+        """把 on_delivered 暂存的帧累加到延迟与间隔统计，读取统计前自动调用"""
+        if not self._pending_stamps:
+            return
+        offsets = np.array(self._pending_offsets, dtype=np.int64)
+        can_ids = np.array(self._pending_ids, dtype=np.intp)
+        stamps = np.array(self._pending_stamps, dtype=np.int64)
+        self._pending_offsets.clear()
+        self._pending_stamps.clear()
+        self._pending_ids.clear()
+        self._add_frames(offsets, can_ids, stamps)
+
+    def _add_frames(self, offsets, can_ids, timestamps_us):
+        lowest = int(offsets.min())
+        if self._clock_offset is None or lowest < self._clock_offset:
+            self._clock_offset = lowest
+        latency = offsets - self._clock_offset
+        self._delivery_latency.add(latency)
+        if can_ids is not None:
+            self._latency_by_id.add(can_ids, latency)
+            self._add_intervals(can_ids, timestamps_us)
+
+    @property
+    def delivery_latency(self) -> RunningStats:
+        self.flush()
+        return self._delivery_latency
+
+    @property
+    def latency_by_id(self) -> LatencyHistogram:
+        self.flush()
+        return self._latency_by_id
+
+    @property
+    def interval_by_id(self) -> LatencyHistogram:
+        self.flush()
+        return self._interval_by_id
+
+    def _add_intervals(self, can_ids, timestamps_us):
+        """按 CanId 稳定排序后相邻帧的时间戳差，每个 CanId 的第一帧与上一批的最后一帧相减"""
+        can_ids = np.asarray(can_ids, dtype=np.intp)
+        timestamps = np.asarray(timestamps_us, dtype=np.int64)
+        order = np.argsort(can_ids, kind="stable")
+        ids, stamps = can_ids[order], timestamps[order]
+        previous = np.empty_like(stamps)
+        previous[1:] = stamps[:-1]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = ids[1:] != ids[:-1]
+        previous[first] = self._last_timestamp[ids[first]]
+        valid = previous > 0
+        self._interval_by_id.add(ids[valid], stamps[valid] - previous[valid])
+        last = np.ones(len(ids), dtype=bool)
+        last[:-1] = first[1:]
+        self._last_timestamp[ids[last]] = stamps[last]
+
+    @property
+    def mean_batch(self) -> float:
+        """非空读取的平均帧数"""
+        reads = self.reads - self.batch_sizes[0]
+        return self.frames_read / reads if reads else 0.0
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.start_time
+        handled = self.frames_kept + self.frames_discarded
+        return {
+            "elapsed_s": elapsed,
+            "frames_read": self.frames_read,
+            "frames_per_second": self.frames_read / elapsed if elapsed > 0 else 0.0,
+            "reads": self.reads,
+            "empty_reads": self.batch_sizes[0],
+            "mean_batch": self.mean_batch,
+            "max_batch": self.max_batch,
+            "batch_sizes": {("0" if i == 0 else "<%d" % (1 << i)): n for i, n in enumerate(self.batch_sizes) if n},
+            "overruns": self.overruns,
+            "frames_kept": self.frames_kept,
+            "frames_discarded": self.frames_discarded,
+            "kept_ratio": self.frames_kept / handled if handled else 1.0,
+            "frames_lost": self.frames_lost,
+            "deliveries": self.deliveries,
+            "dispatch_delay_ms": self.dispatch_delay.to_dict(1e-3),
+            "delivery_latency_ms": self.delivery_latency.to_dict(1e-3),
+            "latency_by_id_ms": self.latency_by_id.to_dict(),
+            "interval_by_id_ms": self.interval_by_id.to_dict(),
+        }
+
+    def summary(self) -> str:
+        """状态栏显示的简要统计，帧率与延迟为上次调用以来的窗口值"""
+        now = time.monotonic()
+        elapsed = now - self._window_time
+        rate = (self.frames_read - self._window_frames) / elapsed if elapsed > 0 else 0.0
+        self._window_time = now
+        self._window_frames = self.frames_read
+        latency_mean, latency_max = self.delivery_latency.take_window()
+        self.dispatch_delay.take_window()
+        return "%d fps | batch %.0f/%d | drop %d/%d | lat %.1f/%.1f ms" % (
+            rate, self.mean_batch, self.max_batch,
+            self.overruns, self.frames_lost, latency_mean / 1000, latency_max / 1000)
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
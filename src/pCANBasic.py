@@ -365,6 +365,12 @@ class TPCANChannelInformation (Structure):
                  ("device_id",         c_uint),                            # Device number
                  ("channel_condition", c_uint) ]                           # Availability status of a PCAN-Channel
 
+# PCANBasic backends
+#
+PCAN_BACKEND_ENV              = "PCAN_BACKEND"  # Environment variable used to select the backend at startup
+PCAN_BACKEND_NATIVE           = "native"        # PCAN-Basic library (PCANBasic.dll / libpcanbasic.so / libPCBUSB.dylib)
+PCAN_BACKEND_VIRTUAL          = "virtual"       # In-process virtual bus, no library and no adapter (see virtualPCANBasic)
+
 #///////////////////////////////////////////////////////////
 # PCAN-Basic API function declarations
 #///////////////////////////////////////////////////////////
@@ -374,8 +380,26 @@ class TPCANChannelInformation (Structure):
 class PCANBasic:
     """
       PCAN-Basic API class implementation
-    """      
-    def __init__(self):
+
+    Remarks:
+      The backend is selected with the "backend" argument or, when it is
+      omitted, with the PCAN_BACKEND environment variable. "native" (default)
+      loads the PCAN-Basic library, "virtual" returns a VirtualPCANBasic
+      instance exposing the same methods on an in-process bus.
+    """
+    def __new__(cls, backend=None, *args, **kwargs):
+        if cls is PCANBasic:
+            if backend is None:
+                backend = os.environ.get(PCAN_BACKEND_ENV, PCAN_BACKEND_NATIVE)
+            backend = backend.lower()
+            if backend == PCAN_BACKEND_VIRTUAL:
+                from .virtualPCANBasic import VirtualPCANBasic
+                cls = VirtualPCANBasic
+            elif backend != PCAN_BACKEND_NATIVE:
+                raise ValueError(f"Unknown PCANBasic backend: {backend}")
+        return super().__new__(cls)
+
+    def __init__(self, backend=None):
         name = "PCANBasic"
         # Loads the PCANBasic API
         #     
@@ -578,6 +602,63 @@ class PCANBasic:
             print ("Exception on PCANBasic.Read")
             return "Exception on PCANBasic.Write"
 
+    # Returns the reusable message/timestamp buffers used by ReadBatch
+    #
+    def _batch_buffers(
+        self,
+        MaxFrames):
+
+        if getattr(self, "_batch_size", 0) < MaxFrames:
+            self._batch_size = MaxFrames
+            self._batch_msgs = (TPCANMsg * MaxFrames)()
+            self._batch_timestamps = (TPCANTimestamp * MaxFrames)()
+            # byref objects are built once so CAN_Read calls do not allocate
+            self._batch_msg_refs = [byref(self._batch_msgs, i * sizeof(TPCANMsg)) for i in range(MaxFrames)]
+            self._batch_timestamp_refs = [byref(self._batch_timestamps, i * sizeof(TPCANTimestamp)) for i in range(MaxFrames)]
+        return self._batch_msgs, self._batch_timestamps
+
+    # Reads up to MaxFrames CAN messages into reusable buffers
+    #
+    def ReadBatch(
+        self,
+        Channel,
+        MaxFrames):
+
+        """
+          Reads up to MaxFrames CAN messages from the receive queue of a PCAN Channel
+
+        Remarks:
+          The messages are written into ctypes arrays owned by this object and
+          reused by the next call, copy them before calling ReadBatch again.
+          Reading stops at MaxFrames or at the first status other than
+          PCAN_ERROR_OK (e.g. PCAN_ERROR_QRCVEMPTY once the queue is drained).
+          The return value of this method is a 4-touple:
+          [0]: A TPCANStatus error code of the last read
+          [1]: The number of messages read
+          [2]: A TPCANMsg array, entries [0..count-1] are valid
+          [3]: A TPCANTimestamp array, entries [0..count-1] are valid
+
+        Parameters:
+          Channel   : A TPCANHandle representing a PCAN Channel
+          MaxFrames : Maximum number of messages to read
+
+        Returns:
+          A touple with four values. Exceptions raised while calling the
+          library are not caught, so callers never receive a non-tuple result.
+        """
+        msgs, timestamps = self._batch_buffers(MaxFrames)
+        read = self.__m_dllBasic.CAN_Read
+        msg_refs = self._batch_msg_refs
+        timestamp_refs = self._batch_timestamp_refs
+        res = PCAN_ERROR_OK
+        count = 0
+        while count < MaxFrames:
+            res = read(Channel, msg_refs[count], timestamp_refs[count])
+            if res != PCAN_ERROR_OK:
+                break
+            count += 1
+        return TPCANStatus(res), count, msgs, timestamps
+
     # Reads a CAN message from the receive queue of a FD capable PCAN Channel
     #
     def ReadFD(
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+压力传感器 CAN 协议
+
+上位机发送帧 ID 为 0x300 | CanId（见 tool.can_id_generate_gression_300），
+传感器上报/应答帧 ID 为 0x700 | CanId。
+"""
+from enum import IntEnum
+
+from . import pCANBasic
+from . import tool
+
+
+class Command(IntEnum):
+    ID = 0x02
+    Freq = 0x1E
+    Save = 0x1D
+    Reset = 0xD3
+    Switch = 0xE0  # 自定义指令，切换功能（0上报物理值，1上报ad值，2进行校准数据保存）
+    Cal = 0xE1
+
+
+REPLY_ID_FIRST = 0x700  # 传感器应答帧 ID 范围
+REPLY_ID_LAST = 0x7FF
+
+
+def reply_id_ranges(can_ids):
+    """将传感器 CanId 集合转换为连续的应答帧 ID 区间 [(from_id, to_id), ...]"""
+    ranges = []
+    for reply_id in sorted({REPLY_ID_FIRST | (can_id & 0xFF) for can_id in can_ids}):
+        if ranges and ranges[-1][1] + 1 == reply_id:
+            ranges[-1][1] = reply_id
+        else:
+            ranges.append([reply_id, reply_id])
+    return [tuple(r) for r in ranges]
+
+
+def configure_reply_filter(drv, channel, can_ids=None):
+    """
+    配置驱动接收过滤器，只让传感器应答帧进入接收队列
+
+    can_ids 为空时接收整个 0x700-0x7FF 范围，否则只接收这些传感器的应答帧。
+    配置失败时恢复为全开，返回 TPCANStatus。
+    """
+    ranges = reply_id_ranges(can_ids) if can_ids else [(REPLY_ID_FIRST, REPLY_ID_LAST)]
+
+    # FilterMessages 在自定义状态下只会扩展范围，先关闭再重新设置
+    status = drv.SetValue(channel, pCANBasic.PCAN_MESSAGE_FILTER, pCANBasic.PCAN_FILTER_CLOSE)
+    if status == pCANBasic.PCAN_ERROR_OK:
+        for from_id, to_id in ranges:
+            status = drv.FilterMessages(channel, from_id, to_id, pCANBasic.PCAN_MODE_STANDARD)
+            if status != pCANBasic.PCAN_ERROR_OK:
+                break
+    if status != pCANBasic.PCAN_ERROR_OK:
+        drv.SetValue(channel, pCANBasic.PCAN_MESSAGE_FILTER, pCANBasic.PCAN_FILTER_OPEN)
+    return status
+
+
+def write_command(drv, channel, can_id: int, data):
+    """向 can_id 的传感器写入一帧指令（LEN 8，不足补 0），返回 TPCANStatus"""
+    msg = pCANBasic.TPCANMsg()
+    msg.ID = tool.can_id_generate_gression_300(can_id)
+    msg.LEN = 8
+    msg.MSGTYPE = pCANBasic.PCAN_MESSAGE_STANDARD
+    for i in range(8):
+        msg.DATA[i] = data[i] if i < len(data) else 0
+    return drv.Write(channel, msg)
+
+
+def build_cal_frame(index: int, ad_value: int, range_value: int):
+    """标定点写入帧：Cal, 序号, adValue(4字节小端), rangeValue(2字节小端)"""
+    return [Command.Cal, index & 0xFF,
+            ad_value & 0xFF, (ad_value >> 8) & 0xFF, (ad_value >> 16) & 0xFF, (ad_value >> 24) & 0xFF,
+            range_value & 0xFF, (range_value >> 8) & 0xFF]
+
+
+def is_cal_ack(data, length: int) -> bool:
+    """
+    判断应答帧是否为标定点确认
+
+    约定传感器收到 Cal 帧后从 0x700 | CanId 原样回送该帧（LEN 8），
+    与 AD 值上报（LEN 4）、物理值上报（LEN 2）通过长度区分。
+    现有固件是否回送尚未确认，因此等待确认的写入需要显式开启（界面 Confirm cal points、命令行 --ack）。
+    """
+    return length == 8 and data[0] == Command.Cal
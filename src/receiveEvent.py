@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+PCAN_RECEIVE_EVENT 接收事件等待
+
+Linux 驱动通过 GetValue(PCAN_RECEIVE_EVENT) 返回一个在接收队列非空时可读的文件描述符，
+Windows 需要创建事件句柄并通过 SetValue(PCAN_RECEIVE_EVENT) 交给驱动，
+虚拟后端返回一个等价的 threading.Event。
+"""
+import platform
+import select
+from abc import ABC, abstractmethod
+
+from . import pCANBasic
+
+
+class ReceiveEvent(ABC):
+    """阻塞等待接收事件，wait 在有帧到达时返回 True，超时返回 False"""
+
+    @abstractmethod
+    def wait(self, timeout: float) -> bool:
+        ...
+
+    def close(self):
+        pass
+
+
+class SignalReceiveEvent(ReceiveEvent):
+    """threading.Event 等具有 wait(timeout) 的信号对象"""
+
+    def __init__(self, signal):
+        self.signal = signal
+
+    def wait(self, timeout: float) -> bool:
+        return self.signal.wait(timeout)
+
+
+class FdReceiveEvent(ReceiveEvent):
+    """Linux 驱动提供的文件描述符"""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(readable)
+
+
+class WinReceiveEvent(ReceiveEvent):
+    """Windows 事件句柄，创建后注册到驱动，关闭时注销"""
+    WAIT_OBJECT_0 = 0
+
+    def __init__(self, drv, channel):
+        from ctypes import windll
+        self.kernel32 = windll.kernel32
+        self.drv = drv
+        self.channel = channel
+        self.handle = self.kernel32.CreateEventW(None, False, False, None)
+        if not self.handle:
+            raise OSError("CreateEvent failed")
+        result = drv.SetValue(channel, pCANBasic.PCAN_RECEIVE_EVENT, self.handle)
+        if result != pCANBasic.PCAN_ERROR_OK:
+            self.kernel32.CloseHandle(self.handle)
+            self.handle = None
+            raise OSError(f"PCAN_RECEIVE_EVENT could not be configured ({result})")
+
+    def wait(self, timeout: float) -> bool:
+        return self.kernel32.WaitForSingleObject(self.handle, int(timeout * 1000)) == self.WAIT_OBJECT_0
+
+    def close(self):
+        if self.handle:
+            self.drv.SetValue(self.channel, pCANBasic.PCAN_RECEIVE_EVENT, 0)
+            self.kernel32.CloseHandle(self.handle)
+            self.handle = None
+
+
+def open_receive_event(drv, channel):
+    """
+    获取通道的接收事件，返回 (ReceiveEvent, "")
+
+    驱动不支持时返回 (None, 原因)，调用方回退为轮询并显示原因
+    """
+    try:
+        result = drv.GetValue(channel, pCANBasic.PCAN_RECEIVE_EVENT)
+        if isinstance(result, tuple) and result[0] == pCANBasic.PCAN_ERROR_OK:
+            value = result[1]
+            if hasattr(value, "wait"):
+                return SignalReceiveEvent(value), ""
+            if platform.system() != 'Windows' and isinstance(value, int) and value > 0:
+                return FdReceiveEvent(value), ""
+        if platform.system() == 'Windows':
+            return WinReceiveEvent(drv, channel), ""
+        status = result[0] if isinstance(result, tuple) else result
+        return None, "PCAN_RECEIVE_EVENT is not supported (%s)" % status
+    except Exception as e:
+        return None, str(e)
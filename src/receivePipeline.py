@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+接收管线
+
+读空驱动接收队列 → FrameRingBuffer → tool.decode_frames → SensorStateTable.dispatch，
+界面和 CanSession 共用同一实现，不依赖 Qt。
+
+drain 只写入环形缓冲区，界面在接收线程（ReadCanMsgWork）中调用；deliver 解码并分发帧序号区间内的帧，
+界面在主线程中调用。两者之间只通过 frame_buffer 的帧序号交接，deliver 用 FrameRingBuffer.snapshot 读取。CanSession 在调用线程中依次调用两者（poll）。
+"""
+from . import pCANBasic
+from . import tool
+from .frameBuffer import FrameRingBuffer, ReadBatchSizer
+from .metrics import PipelineMetrics
+from .protocol import Command
+from .sensorState import SensorStateTable
+
+
+class ReceivePipeline:
+    def __init__(self, drv, capacity: int = 1 << 16, metrics: PipelineMetrics = None):
+        self.drv = drv
+        self.frame_buffer = FrameRingBuffer(capacity)
+        self.read_batch = ReadBatchSizer()  # 每次 ReadBatch 最多读取的帧数，按积压调整
+        self.sensor_state = SensorStateTable()
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+
+    def drain(self, channel, recorder=None):
+        """
+        读空 channel 的驱动接收队列并写入环形缓冲区，返回 (start, end, status)
+
+        [start, end) 为本次写入的帧序号区间。status 为 PCAN_ERROR_OK 表示队列已读空；
+        ReadBatch 返回 QRCVEMPTY、QOVERRUN 以外的状态（通道未初始化、总线关闭等）时立即停止读取，
+        status 为该状态，由调用方处理。recorder 不为空时同时写入接收帧记录（FrameRecorder）
+        """
+        start = self.frame_buffer.head
+        batch_size = self.read_batch.size
+        saturated = False
+        while True:
+            status, count, msgs, timestamps = self.drv.ReadBatch(channel, batch_size)
+            # PCAN_ERROR_QOVERRUN：驱动接收队列溢出，帧已丢失，继续读空队列
+            self.metrics.on_read_status(status)
+            saturated = saturated or count == batch_size
+            if count:
+                self.frame_buffer.push_batch(msgs, timestamps, count)
+                if recorder is not None:
+                    for frames in self.frame_buffer.segments(self.frame_buffer.head - count):
+                        recorder.write(frames)
+            # 其他状态重复读取也不会恢复，继续循环会一直占用接收线程
+            error = status & ~(pCANBasic.PCAN_ERROR_QRCVEMPTY | pCANBasic.PCAN_ERROR_QOVERRUN)
+            if error:
+                status = error
+                break
+            if status & pCANBasic.PCAN_ERROR_QRCVEMPTY:
+                status = pCANBasic.PCAN_ERROR_OK
+                break
+        end = self.frame_buffer.head
+        self.metrics.on_drain(end - start)
+        self.read_batch.update(end - start, saturated)
+        return start, end, status
+
+    def deliver(self, start: int, end: int = None, read_us: int = None, cal_writer=None, sensor_values=True):
+        """
+        解码并分发帧序号 [start, end) 的帧，已被覆盖或读取期间被覆盖的帧计入 metrics.frames_lost
+
+        read_us 为 drain 完成时的 now_us()，cal_writer 接收标定点确认帧，
+        sensor_values 为 False 时 2 字节帧也按 AD 值处理
+        """
+        frames, lost = self.frame_buffer.snapshot(start, end)
+        self.metrics.on_lost(lost)
+        if len(frames):
+            self.handle_frames(frames, read_us, cal_writer, sensor_values)
+
+    def handle_frames(self, frames, read_us=None, cal_writer=None, sensor_values=True):
+        mask, can_ids, ad_values, decoded_values = tool.decode_frames(frames["id"], frames["data"])
+        self.metrics.on_delivered(len(can_ids), len(frames) - len(can_ids), frames["timestamp"][mask], read_us,
+                                  can_ids)
+        if len(can_ids) == 0:
+            return
+
+        lengths = frames["len"][mask]
+        timestamps = frames["timestamp"][mask]
+        # 标定点确认帧（见 protocol.is_cal_ack）交给写入器，不作为数值上报
+        is_ack = (lengths == 8) & (frames["data"][mask][:, 0] == Command.Cal)
+        if is_ack.any():
+            if cal_writer is not None:
+                acks = frames["data"][mask][is_ack]
+                for can_id, data in zip(can_ids[is_ack].tolist(), acks.tolist()):
+                    cal_writer.on_reply(can_id, data, 8)
+            keep = ~is_ack
+            can_ids, ad_values, decoded_values = can_ids[keep], ad_values[keep], decoded_values[keep]
+            lengths, timestamps = lengths[keep], timestamps[keep]
+            if len(can_ids) == 0:
+                return
+
+        is_sensor_value = lengths == 2 if sensor_values else None
+        self.sensor_state.dispatch(can_ids, ad_values, decoded_values, timestamps, is_sensor_value)
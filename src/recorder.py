@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+接收帧二进制记录
+
+文件格式（小端）：
+  文件头   magic "PCANREC\\0"、版本 u2、单帧字节数 u2、保留 u4、开始时间 u8（Unix 微秒）
+  数据块   magic "CHNK"、帧数 u4、首帧序号 u8，随后为帧数 × FRAME_DTYPE 的原始字节
+
+只追加写入，程序异常退出时最后一个完整数据块之前的内容仍可读取。
+接收线程只把帧拷贝到当前数据块，写满的数据块交给后台线程写入磁盘；
+写入队列满时丢弃整块并计数，不阻塞接收。块首帧序号不连续即为丢帧位置。
+"""
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .frameBuffer import FRAME_DTYPE
+
+RECORD_MAGIC = b"PCANREC\0"
+RECORD_VERSION = 1
+CHUNK_MAGIC = b"CHNK"
+FILE_HEADER = struct.Struct("<8sHHIQ")
+CHUNK_HEADER = struct.Struct("<4sIQ")
+
+
+class RecordFormatError(ValueError):
+    pass
+
+
+class FrameRecorder:
+    def __init__(self, path: str, chunk_frames: int = 8192, queue_chunks: int = 64, buffer_size: int = 1 << 20):
+        """
+        path          记录文件路径，已存在时覆盖
+        chunk_frames  每个数据块的帧数
+        queue_chunks  等待写入磁盘的最大数据块数，超过后丢弃
+        buffer_size   文件写缓冲区字节数
+        """
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.buffer_size = buffer_size
+        self.frames_recorded = 0  # 已交给写线程的帧数
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.error = None  # 写线程遇到的 OSError
+
+        self._queue = queue.Queue(maxsize=queue_chunks)
+        self._chunk = np.empty(chunk_frames, dtype=FRAME_DTYPE)
+        self._chunk_len = 0
+        self._chunk_seq = 0  # 当前数据块首帧序号
+        self._file = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_recording(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        self._file = open(self.path, "wb", buffering=self.buffer_size)
+        self._file.write(FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, FRAME_DTYPE.itemsize, 0,
+                                          int(time.time() * 1_000_000)))
+        self._thread = threading.Thread(target=self._run, name="FrameRecorder", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, frames: np.ndarray):
+        """记录一段 FRAME_DTYPE 帧（如 FrameRingBuffer.segments 的视图），在接收线程中调用"""
+        with self._lock:
+            if self._thread is None:
+                return
+            while len(frames):
+                count = min(len(frames), self.chunk_frames - self._chunk_len)
+                self._chunk[self._chunk_len:self._chunk_len + count] = frames[:count]
+                self._chunk_len += count
+                frames = frames[count:]
+                if self._chunk_len == self.chunk_frames:
+                    self._submit()
+
+    def flush(self):
+        """提交当前未写满的数据块"""
+        with self._lock:
+            if self._thread is not None:
+                self._submit()
+
+    def close(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._submit()
+            thread, self._thread = self._thread, None
+        self._queue.put(None)
+        thread.join()
+        self._file.close()
+        self._file = None
+
+    def _submit(self):
+        if self._chunk_len == 0:
+            return
+        chunk = self._chunk[:self._chunk_len]
+        try:
+            self._queue.put_nowait((self._chunk_seq, chunk))
+            self.frames_recorded += self._chunk_len
+            self._chunk = np.empty(self.chunk_frames, dtype=FRAME_DTYPE)
+        except queue.Full:
+            self.frames_dropped += self._chunk_len
+        self._chunk_seq += self._chunk_len
+        self._chunk_len = 0
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            seq, chunk = item
+            try:
+                self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(chunk), seq))
+                self._file.write(chunk.data)
+                self.bytes_written += CHUNK_HEADER.size + chunk.nbytes
+            except OSError as e:
+                self.error = e
+        try:
+            self._file.flush()
+        except OSError as e:
+            self.error = self.error or e
+
+
+def read_header(f):
+    """读取文件头，返回开始时间（Unix 微秒）"""
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise RecordFormatError("file too short")
+    magic, version, itemsize, _, start_us = FILE_HEADER.unpack(header)
+    if magic != RECORD_MAGIC:
+        raise RecordFormatError("not a frame record")
+    if version != RECORD_VERSION or itemsize != FRAME_DTYPE.itemsize:
+        raise RecordFormatError("unsupported record version %d / frame size %d" % (version, itemsize))
+    return start_us
+
+
+def read_chunks(path: str):
+    """依次返回 (首帧序号, FRAME_DTYPE 数组)，末尾不完整的数据块被忽略"""
+    with open(path, "rb") as f:
+        read_header(f)
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            magic, count, seq = CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC:
+                raise RecordFormatError("bad chunk header at offset %d" % (f.tell() - CHUNK_HEADER.size))
+            data = f.read(count * FRAME_DTYPE.itemsize)
+            if len(data) < count * FRAME_DTYPE.itemsize:
+                return
+            yield seq, np.frombuffer(data, dtype=FRAME_DTYPE)
+
+
+def load_recording(path: str):
+    """读取整个记录，返回 (frames, lost)：全部帧与记录中缺失的帧数"""
+    chunks = []
+    lost = 0
+    expected = 0
+    for seq, frames in read_chunks(path):
+        lost += max(0, seq - expected)
+        expected = seq + len(frames)
+        chunks.append(frames)
+    if not chunks:
+        return np.zeros(0, dtype=FRAME_DTYPE), lost
+    return np.concatenate(chunks), lost
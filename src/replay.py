@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+记录回放
+
+把 recorder 记录的帧按原时间戳注入虚拟总线（VirtualBus），应用照常通过
+ReadBatch → readMsg → on_worker_result_callback 接收，可在没有适配器的机器上复现现场数据、
+测量解码吞吐量。实时模式按记录的时间间隔（乘以速度倍率）注入；最快模式只受接收队列剩余空间限制。
+"""
+import threading
+import time
+
+import numpy as np
+
+from .recorder import load_recording
+
+
+class FrameReplay(threading.Thread):
+    tick = 0.002  # 注入间隔（秒）
+    max_chunk = 4096  # 每次注入的最大帧数
+
+    def __init__(self, bus, frames: np.ndarray, channel=None, speed: float = 1.0, realtime: bool = True):
+        """
+        bus       VirtualBus
+        frames    FRAME_DTYPE 数组，按时间戳排序
+        speed     实时模式的速度倍率
+        realtime  False 时以接收端能接受的最快速度注入，队列满时等待而不丢帧
+        """
+        super().__init__(daemon=True)
+        self.bus = bus
+        self.frames = frames
+        self.channel = bus.default_channel() if channel is None else channel
+        self.speed = speed
+        self.realtime = realtime
+        self.sent = 0  # 已回放的帧数
+        self.queued = 0  # 通过接收过滤器进入接收队列的帧数
+        self.position = 0  # 下一帧的序号
+        self.elapsed = 0.0  # 实际回放时间（秒）
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._anchor()
+
+    @classmethod
+    def from_file(cls, bus, path: str, **kwargs):
+        frames, _ = load_recording(path)
+        return cls(bus, frames, **kwargs)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self) -> float:
+        """记录时长（秒）"""
+        if len(self.frames) == 0:
+            return 0.0
+        return float(self.frames["timestamp"][-1] - self.frames["timestamp"][0]) / 1e6
+
+    @property
+    def current_time(self) -> float:
+        """回放位置对应的记录时间（秒，相对记录开始）"""
+        if len(self.frames) == 0:
+            return 0.0
+        index = min(self.position, len(self.frames) - 1)
+        return float(self.frames["timestamp"][index] - self.frames["timestamp"][0]) / 1e6
+
+    @property
+    def progress(self) -> float:
+        return self.position / len(self.frames) if len(self.frames) else 1.0
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.frames)
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def _anchor(self):
+        """以当前位置和当前时间作为实时节拍的起点"""
+        self._wall_start = time.perf_counter()
+        self._record_start = int(self.frames["timestamp"][self.position]) if not self.finished else 0
+
+    def seek(self, seconds: float):
+        """跳到记录开始后 seconds 秒处"""
+        with self._lock:
+            if len(self.frames) == 0:
+                return
+            target = int(self.frames["timestamp"][0]) + int(seconds * 1e6)
+            self.position = int(np.searchsorted(self.frames["timestamp"], target, side="left"))
+            self._anchor()
+
+    def set_speed(self, speed: float):
+        with self._lock:
+            self.speed = speed
+            self._anchor()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.tick):
+            now = time.perf_counter()
+            with self._lock:
+                self.elapsed += now - last
+                last = now
+                if self.finished:
+                    return
+                self._step(now)
+
+    def _step(self, now: float):
+        if self.realtime:
+            due_us = self._record_start + int((now - self._wall_start) * self.speed * 1e6)
+            end = int(np.searchsorted(self.frames["timestamp"], due_us, side="right"))
+        else:
+            end = len(self.frames)
+        while self.position < end:
+            stop = min(end, self.position + self.max_chunk)
+            if not self.realtime:
+                stop = min(stop, self.position + self.bus.free(self.channel))
+                if stop <= self.position:
+                    return
+            # 实时模式与真实总线一致：接收端跟不上时队列溢出，由驱动报告 PCAN_ERROR_QOVERRUN
+            self.queued += self.bus.inject_frames(self.frames[self.position:stop], self.channel)
+            self.sent += stop - self.position
+            self.position = stop
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+已发现传感器的本地缓存
+
+保存每个通道上扫描到的传感器（CanId、上报间隔、最后出现时间、通道、波特率、最后加载的标定文件），
+重新连接时先用缓存填充 CanId 列表，再由后台扫描确认传感器是否仍在线。
+"""
+import json
+import os
+import time
+
+from .dataModel import SensorRecord, SensorRegistryData
+
+REGISTRY_FILE = "sensorRegistry.json"
+MAX_MISSED_SCANS = 3  # 连续这么多次扫描都未出现的传感器才从缓存中删除
+
+
+class SensorRegistry:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(os.getcwd(), REGISTRY_FILE)
+        self.records = {}  # (channel, can_id) -> SensorRecord
+
+    def load(self):
+        """读取缓存文件，文件不存在或损坏时为空"""
+        self.records.clear()
+        try:
+            with open(self.path, "r") as data:
+                registry = SensorRegistryData.model_validate(json.loads(data.read()))
+        except (OSError, ValueError):
+            return self
+        for record in registry.sensors:
+            self.records[(record.channel, record.canId)] = record
+        return self
+
+    def save(self):
+        """写入缓存文件，失败时抛出 OSError，由调用方提示"""
+        registry = SensorRegistryData(sensors=sorted(self.records.values(), key=lambda r: (r.channel, r.canId)))
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(registry.model_dump_json(indent=2))
+        os.replace(tmp_path, self.path)
+
+    def sensors(self, channel: int, bitrate: int = None):
+        """返回通道（及波特率）上缓存的传感器记录，按 CanId 排序"""
+        return sorted((r for (ch, _), r in self.records.items()
+                       if ch == channel and (bitrate is None or r.bitrate == bitrate)),
+                      key=lambda r: r.canId)
+
+    def record(self, channel: int, can_id: int):
+        return self.records.get((channel, can_id))
+
+    def update_from_discovery(self, channel: int, bitrate: int, discovery, now=None):
+        """
+        用一次完整扫描（IdDiscovery）的结果更新该通道的记录
+
+        一次扫描可能错过低频或暂时离线的传感器，未扫描到的传感器只增加 missedScans，
+        连续 MAX_MISSED_SCANS 次未扫描到才从缓存中删除
+        """
+        now = time.time() if now is None else now
+        for key in [key for key in self.records if key[0] == channel and key[1] not in discovery.first_seen]:
+            record = self.records[key]
+            record.missedScans += 1
+            if record.missedScans >= MAX_MISSED_SCANS:
+                del self.records[key]
+        for can_id in discovery.ids:
+            record = self.records.get((channel, can_id)) or SensorRecord(canId=can_id, channel=channel)
+            record.bitrate = bitrate
+            record.lastSeen = now
+            record.missedScans = 0
+            interval = discovery.interval(can_id)
+            if interval is not None:
+                record.reportInterval = interval
+            self.records[(channel, can_id)] = record
+
+    def set_cal_file(self, channel: int, can_id: int, path: str):
+        record = self.records.get((channel, can_id))
+        if record is not None:
+            record.calFile = path
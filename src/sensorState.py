@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+多传感器状态分发
+
+总线上所有传感器的上报帧按 CanId 分发到 256 槽的状态数组，
+界面中的单传感器显示、扫描、采集等作为消费者读取这些状态。
+"""
+import numpy as np
+
+from .calibration import CalibrationCurve
+
+MAX_SENSORS = 256
+
+
+def last_index_by_id(can_ids: np.ndarray):
+    """返回 (ids, index)：每个出现过的 id 及其在数组中最后一次出现的位置"""
+    reversed_ids = can_ids[::-1]
+    ids, first = np.unique(reversed_ids, return_index=True)
+    return ids, len(can_ids) - 1 - first
+
+
+class SensorStateTable:
+    """
+    按传感器 CanId 保存的最新状态
+
+    ad_value         最新 AD 值
+    sensor_value     最新物理值：AD 帧经标定曲线换算，物理值帧（LEN == 2）直接保存，无结果为 NaN
+    value_reported   最新物理值是否来自传感器直接上报
+    frame_count      收到的帧数
+    last_timestamp   最后一帧的时间戳（微秒）
+    """
+
+    def __init__(self):
+        self.ad_value = np.zeros(MAX_SENSORS, dtype=np.int64)
+        self.sensor_value = np.full(MAX_SENSORS, np.nan)
+        self.value_reported = np.zeros(MAX_SENSORS, dtype=bool)
+        self.frame_count = np.zeros(MAX_SENSORS, dtype=np.uint64)
+        self.last_timestamp = np.zeros(MAX_SENSORS, dtype=np.uint64)
+
+        self.default_curve = CalibrationCurve([], [])
+        self.curves = {}  # can_id -> CalibrationCurve，未设置的传感器使用 default_curve
+        self.consumers = []  # consumer(table, updated_ids)
+        self.ad_stats = None  # 标定点采集时设置为 AdStatistics，累计每一帧的 AD 值
+
+    def reset(self):
+        self.ad_value.fill(0)
+        self.sensor_value.fill(np.nan)
+        self.value_reported.fill(False)
+        self.frame_count.fill(0)
+        self.last_timestamp.fill(0)
+
+    def set_curve(self, can_id: int, curve: CalibrationCurve = None):
+        if curve is None:
+            self.curves.pop(can_id, None)
+        else:
+            self.curves[can_id] = curve
+
+    def curve(self, can_id: int) -> CalibrationCurve:
+        return self.curves.get(can_id, self.default_curve)
+
+    def add_consumer(self, consumer):
+        self.consumers.append(consumer)
+
+    def seen_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.frame_count)
+
+    def dispatch(self, can_ids, ad_values, sensor_values, timestamps, is_sensor_value=None):
+        """
+        分发一批已解码的帧（数组按到达顺序），返回本批更新过的 CanId 数组
+
+        is_sensor_value 标记直接上报物理值的帧，其余帧按 AD 值处理
+        """
+        if len(can_ids) == 0:
+            return can_ids
+        can_ids = can_ids.astype(np.intp, copy=False)
+        if is_sensor_value is None:
+            is_sensor_value = np.zeros(len(can_ids), dtype=bool)
+
+        values = self.default_curve.evaluate_array(ad_values)
+        for can_id, curve in self.curves.items():
+            rows = can_ids == can_id
+            if rows.any():
+                values[rows] = curve.evaluate_array(ad_values[rows])
+        values = np.where(is_sensor_value, sensor_values, values)
+
+        self.frame_count += np.bincount(can_ids, minlength=MAX_SENSORS).astype(np.uint64)
+        ids, last = last_index_by_id(can_ids)
+        self.last_timestamp[ids] = timestamps[last]
+        self.sensor_value[ids] = values[last]
+        self.value_reported[ids] = is_sensor_value[last]
+
+        ad_rows = np.flatnonzero(~is_sensor_value)
+        if len(ad_rows):
+            ad_ids, ad_last = last_index_by_id(can_ids[ad_rows])
+            self.ad_value[ad_ids] = ad_values[ad_rows[ad_last]]
+            if self.ad_stats is not None:
+                self.ad_stats.add(can_ids[ad_rows], ad_values[ad_rows])
+
+        for consumer in self.consumers:
+            consumer(self, ids)
+        return ids
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+不依赖 Qt 的 CAN 会话
+
+连接通道、接收并分发传感器上报帧、扫描 CanId、写入标定表，供命令行和产线脚本使用。
+接收与界面共用 ReceivePipeline，在调用线程中轮询完成，所有操作都是阻塞的。
+"""
+import time
+
+from . import pCANBasic
+from .acquisition import AcquisitionWindow, AdStatistics
+from .calWriter import CalTableWriter, CalWriteScheduler
+from .idDiscovery import IdDiscovery
+from .protocol import Command, configure_reply_filter, write_command
+from .receivePipeline import ReceivePipeline
+
+BROADCAST_ID = 0xFF
+
+
+def parse_bitrate(text: str):
+    """'500K'、'1M' 等转换为 TPCANBaudrate"""
+    value = getattr(pCANBasic, "PCAN_BAUD_" + text.upper(), None)
+    if not isinstance(value, pCANBasic.TPCANBaudrate):
+        raise ValueError("unknown bitrate %s" % text)
+    return value
+
+
+class CanSessionError(RuntimeError):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class CanSession:
+    poll_interval = 0.002  # 接收队列为空时的等待时间（秒）
+
+    def __init__(self, drv=None, channel=pCANBasic.PCAN_USBBUS1, bitrate=pCANBasic.PCAN_BAUD_500K):
+        self.drv = drv if drv is not None else pCANBasic.PCANBasic()
+        self.channel = channel
+        self.bitrate = bitrate
+        self.connected = False
+        self.pipeline = ReceivePipeline(self.drv)
+        self.sensor_state = self.pipeline.sensor_state
+        self.metrics = self.pipeline.metrics  # overruns、frames_lost 等接收指标（PipelineMetrics）
+        self.cal_writer = None  # 正在进行的标定表写入（CalWriteScheduler），接收到的确认帧交给它
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.disconnect()
+
+    def error_text(self, status) -> str:
+        if not isinstance(status, int):
+            return str(status)
+        result = self.drv.GetErrorText(status, 0)
+        if result[0] != pCANBasic.PCAN_ERROR_OK:
+            return "error 0x%X" % status
+        return result[1].decode(errors="replace") if isinstance(result[1], bytes) else str(result[1])
+
+    def connect(self, can_ids=None):
+        """初始化通道并只接收传感器应答帧，失败时抛出 CanSessionError"""
+        status = self.drv.Initialize(self.channel, self.bitrate)
+        if status not in (pCANBasic.PCAN_ERROR_OK, pCANBasic.PCAN_ERROR_CAUTION):
+            raise CanSessionError(self.error_text(status), status)
+        self.connected = True
+        configure_reply_filter(self.drv, self.channel, can_ids)
+
+    def disconnect(self):
+        if self.connected:
+            self.drv.Uninitialize(self.channel)
+            self.connected = False
+
+    def write(self, can_id: int, data) -> int:
+        """向 can_id 的传感器写入一帧指令，返回 TPCANStatus"""
+        return write_command(self.drv, self.channel, can_id, data)
+
+    def command(self, can_id: int, data):
+        """写入一帧指令，失败时抛出 CanSessionError"""
+        status = self.write(can_id, data)
+        if status != pCANBasic.PCAN_ERROR_OK:
+            raise CanSessionError(self.error_text(status), status)
+
+    def poll(self) -> int:
+        """读空驱动接收队列并处理，返回读取的帧数；驱动返回错误状态时处理已读取的帧后抛出 CanSessionError"""
+        start, end, status = self.pipeline.drain(self.channel)
+        self.pipeline.deliver(start, end, cal_writer=self.cal_writer)
+        if status != pCANBasic.PCAN_ERROR_OK:
+            raise CanSessionError(self.error_text(status), status)
+        return end - start
+
+    def run(self, duration: float = None, until=None):
+        """处理接收帧，直到 duration 秒后或 until() 为真"""
+        end = None if duration is None else time.monotonic() + duration
+        while True:
+            if until is not None and until():
+                return True
+            if end is not None and time.monotonic() >= end:
+                return False
+            if not self.poll():
+                time.sleep(self.poll_interval)
+
+    def scan(self, discovery: IdDiscovery = None) -> IdDiscovery:
+        """广播切换到 AD 值上报并扫描在线传感器"""
+        discovery = discovery or IdDiscovery()
+        self.command(BROADCAST_ID, [Command.Switch, 0x01])
+        self.sensor_state.reset()
+
+        def observe(state, can_ids):
+            discovery.observe(can_ids, time.monotonic(), state.frame_count[can_ids])
+
+        self.sensor_state.add_consumer(observe)
+        try:
+            discovery.start(time.monotonic())
+            self.run(until=lambda: discovery.finished(time.monotonic()))
+        finally:
+            self.sensor_state.consumers.remove(observe)
+        return discovery
+
+    def acquire(self, can_id: int, duration: float = None, samples: int = None) -> dict:
+        """
+        采集传感器上报的每一帧 AD 值，直到收到 samples 个或经过 duration 秒（都未给出时为 0.5 秒）
+
+        返回 AdStatistics.summary：count、mean、std、min、max
+        """
+        if duration is None and samples is None:
+            duration = 0.5
+        window = AcquisitionWindow(can_id, samples, duration)
+        stats = AdStatistics()
+        self.command(can_id, [Command.Switch, 0x01])
+        self.sensor_state.ad_stats = stats
+        try:
+            window.start(stats, time.monotonic())
+            self.run(until=lambda: window.finished(stats, time.monotonic()))
+        finally:
+            self.sensor_state.ad_stats = None
+        return stats.summary(can_id)
+
+    def write_tables(self, tables, require_ack=False, timeout: float = 30.0) -> CalWriteScheduler:
+        """
+        写入标定表 {can_id: [(adValue, rangeValue), ...]}，返回完成（或超时）后的 CalWriteScheduler
+
+        默认按固定间隔写入；require_ack 只用于会回送 Cal 确认的固件（见 protocol.is_cal_ack）
+        """
+        writers = [CalTableWriter(can_id, points, require_ack=require_ack, frame_interval=0 if require_ack else 0.01)
+                   for can_id, points in tables.items()]
+        self.cal_writer = CalWriteScheduler(writers)
+        end = time.monotonic() + timeout
+        try:
+            while not self.cal_writer.done and time.monotonic() < end:
+                self.cal_writer.pump(self.write, time.monotonic())
+                if not self.poll():
+                    time.sleep(self.poll_interval)
+        finally:
+            scheduler, self.cal_writer = self.cal_writer, None
+        return scheduler
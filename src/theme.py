@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+应用样式表
+
+所有控件样式集中在一份应用级样式表中，控件通过动态属性选择样式：
+  role   控件用途：primary（主要操作）、read（读取/扫描）、write（写入）、
+         adCaption / valueCaption（数值标题）、display（实时数值）
+  state  控件状态：connected（已连接）、error（失败）
+状态变化只切换属性并重新 polish 该控件，不重新解析样式表。
+"""
+
+PRIMARY_COLOR = "#0078D7"
+READ_COLOR = "#ffa657"
+DANGER_COLOR = "#ff7b72"
+OK_COLOR = "#02913a"
+ERROR_COLOR = "#ff0000"
+
+APP_STYLESHEET = f"""
+QPushButton[role="primary"], QPushButton[role="read"], QPushButton[role="write"] {{
+    color: white;
+    background-color: {PRIMARY_COLOR};
+    border: none;
+    border-radius: 5px;
+    font-size: 14px;
+}}
+QPushButton[role="primary"] {{
+    padding: 5px 10px;
+}}
+QPushButton[role="read"], QPushButton[role="write"] {{
+    padding: 3px 5px;
+}}
+QPushButton[role="read"] {{
+    background-color: {READ_COLOR};
+}}
+QPushButton[role="primary"][state="connected"] {{
+    background-color: {DANGER_COLOR};
+}}
+
+QLabel[role="adCaption"], QLabel[role="valueCaption"] {{
+    font-size: 16px;
+    font-weight: bold;
+}}
+QLabel[role="adCaption"] {{
+    color: #ff8936;
+}}
+QLabel[role="valueCaption"] {{
+    color: {OK_COLOR};
+}}
+QLabel[role="display"] {{
+    color: white;
+    font-size: 22px;
+    font-weight: 400;
+    background-color: #3A3A3A;
+    border: 2px solid #555;
+    border-radius: 6px;
+    padding: 12px;
+    margin: 5px;
+}}
+
+QStatusBar QProgressBar {{
+    border: 1px solid;
+    text-align: center;
+}}
+QStatusBar QProgressBar::chunk {{
+    background-color: {OK_COLOR};
+    width: 50px;
+}}
+QStatusBar QProgressBar[state="error"]::chunk {{
+    background-color: {ERROR_COLOR};
+}}
+"""
+
+
+def apply(app):
+    """设置应用级样式表，在创建窗口之前调用"""
+    app.setStyleSheet(APP_STYLESHEET)
+
+
+def set_role(widget, role: str):
+    widget.setProperty("role", role)
+
+
+def set_state(widget, state: str = ""):
+    """切换控件的 state 属性，属性未变化时不重新 polish"""
+    if (widget.property("state") or "") == state:
+        return
+    widget.setProperty("state", state)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 
 
 def can_id_generate_gression_300(value: int):
@@ -33,6 +34,39 @@ def merge_int8_to_int16(low, high):
     return (high << 8) | low
 
 
+def can_id_check_gression_700_array(values: np.ndarray):
+    """批量判断CanId值的高三位是否为1，返回布尔掩码"""
+    return (values & 0x700) == 0x700
+
+
+def can_id_remove_gression_array(values: np.ndarray):
+    """批量移除CanId高三位"""
+    return values & 0x0FF
+
+
+def remove_gression_high_3_array(low: np.ndarray, high: np.ndarray):
+    """批量将两个uint8合并为uint16并且移除值的高三位"""
+    return ((high.astype(np.uint16) << 8) | low) & 0x1FFF
+
+
+def merge_int8_to_int32_array(data: np.ndarray):
+    """将 (N, 8) 的 uint8 数据前4个字节按小端合并为uint32"""
+    return np.ascontiguousarray(data[:, :4]).view("<u4").ravel()
+
+
+def decode_frames(ids: np.ndarray, data: np.ndarray):
+    """
+    批量解码传感器上报帧
+
+    返回 (mask, can_ids, ad_values, sensor_values)：
+    mask 标记高三位为1的帧，其余三个数组只包含这些帧，依次为传感器 CanId、AD 值和13位物理值
+    """
+    mask = can_id_check_gression_700_array(ids)
+    data = data[mask]
+    can_ids = can_id_remove_gression_array(ids[mask])
+    return mask, can_ids, merge_int8_to_int32_array(data), remove_gression_high_3_array(data[:, 0], data[:, 1])
+
+
 if __name__ == '__main__':
     print(hex(can_id_generate_gression_300(0xFF)))
     print(can_id_check_gression_700(0x301))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from PySide6.QtCore import QObject, QTimer
+
+
+class UpdateCoalescer(QObject):
+    """
+    按固定刷新率合并界面更新
+
+    post(key, value) 只记录每个 key 的最新值，定时器到期后对每个 key 调用一次 render(key, value)，
+    没有新数据时定时器不运行。采集、记录仍然在数据到达时处理每一帧，只有界面刷新被合并。
+    """
+
+    def __init__(self, render, refresh_hz: float = 25, parent=None):
+        super().__init__(parent)
+        self._render = render
+        self._pending = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self.set_refresh_rate(refresh_hz)
+
+    def set_refresh_rate(self, refresh_hz: float):
+        self.refresh_hz = refresh_hz
+        self._timer.setInterval(max(1, int(1000 / refresh_hz)))
+
+    def post(self, key, value=None):
+        self._pending[key] = value
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for key, value in pending.items():
+            self._render(key, value)
+
+    def clear(self):
+        self._timer.stop()
+        self._pending.clear()
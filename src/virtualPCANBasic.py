@@ -0,0 +1,543 @@
+# -*- coding: utf-8 -*-
+"""
+In-process virtual PCAN-Basic backend.
+
+VirtualPCANBasic exposes the same methods as pCANBasic.PCANBasic but keeps the
+receive queues in Python, so the receive/decode path can be exercised on a
+machine without PCANBasic.dll / libpcanbasic.so and without an adapter.
+
+Frames reach the receive queue through VirtualBus.inject / inject_many, or at a
+target rate through VirtualBus.start_stream. Frames written by the application
+are handed to the callables registered in VirtualBus.write_hooks.
+
+Selecting the backend:
+    PCAN_BACKEND=virtual python HTControl.py
+    drv = pCANBasic.PCANBasic(backend="virtual")
+
+Optional load generation when a channel is initialized:
+    PCAN_VIRTUAL_SENSORS=1-32     CAN ids of VirtualSensor objects that answer
+                                  commands and report AD / physical values
+    PCAN_VIRTUAL_RATE=3200        total report frames per second on the bus
+"""
+import os
+import random
+import struct
+import threading
+import time
+from collections import deque
+from ctypes import memmove, addressof
+
+import numpy as np
+
+from .frameBuffer import PCAN_MSG_DTYPE, PCAN_TIMESTAMP_DTYPE
+from .pCANBasic import *
+from .protocol import Command
+
+VIRTUAL_SENSORS_ENV = "PCAN_VIRTUAL_SENSORS"
+VIRTUAL_RATE_ENV = "PCAN_VIRTUAL_RATE"
+
+# 队列中的帧直接保存为 TPCANMsg / TPCANTimestamp 的内存布局，读取时整块拷贝
+_MSG_STRUCT = struct.Struct("<IBB8s%dx" % (sizeof(TPCANMsg) - 14))
+_TIMESTAMP_STRUCT = struct.Struct("<IHH")
+_MSG_SIZE = sizeof(TPCANMsg)
+_TIMESTAMP_SIZE = sizeof(TPCANTimestamp)
+
+
+def _int(value):
+    """ctypes 常量与 int 统一为 int"""
+    return value.value if hasattr(value, "value") else int(value)
+
+
+def now_us():
+    """虚拟驱动时钟（微秒），与 TPCANTimestamp 的总微秒数同基准"""
+    return time.monotonic_ns() // 1000
+
+
+def pack_timestamp(total_us: int) -> bytes:
+    """Total Microseconds = micros + 1000 * millis + 0x100000000 * 1000 * millis_overflow"""
+    millis, micros = divmod(total_us, 1000)
+    return _TIMESTAMP_STRUCT.pack(millis & 0xFFFFFFFF, (millis >> 32) & 0xFFFF, micros)
+
+
+class VirtualChannel:
+    """一个虚拟 PCAN 通道的接收队列与过滤器"""
+
+    def __init__(self, handle: int, queue_size: int):
+        self.handle = handle
+        self.queue_size = queue_size
+        self.queue = deque()
+        self.initialized = False
+        self.bitrate = 0
+        self.overrun = False
+        self.filter_mode = PCAN_FILTER_OPEN
+        self.filter_ranges = []  # [(from_id, to_id), ...]
+        self.receive_event = threading.Event()  # 队列非空时置位，对应 PCAN_RECEIVE_EVENT
+
+    def accepts(self, can_id: int) -> bool:
+        if self.filter_mode == PCAN_FILTER_OPEN:
+            return True
+        if self.filter_mode == PCAN_FILTER_CLOSE:
+            return False
+        for from_id, to_id in self.filter_ranges:
+            if from_id <= can_id <= to_id:
+                return True
+        return False
+
+    def reset(self):
+        self.queue.clear()
+        self.overrun = False
+        self.receive_event.clear()
+
+    def queue_empty(self):
+        """队列读空时复位接收事件，复位后再检查一次，避免丢失并发注入的帧"""
+        self.receive_event.clear()
+        if self.queue:
+            self.receive_event.set()
+
+
+class VirtualBus:
+    """
+    虚拟 CAN 总线，保存每个通道的接收队列
+
+    队列元素: (TPCANMsg 字节, TPCANTimestamp 字节)
+    """
+
+    def __init__(self, channels=(PCAN_USBBUS1,), queue_size=32768):
+        self.channels = {_int(h): VirtualChannel(_int(h), queue_size) for h in channels}
+        self.write_hooks = []  # hook(channel, can_id, msgtype, data: bytes)
+        self.streams = []
+        self.sensors = {}  # 环境变量创建的虚拟传感器，channel -> [VirtualSensor]
+
+    def channel(self, handle) -> VirtualChannel:
+        return self.channels.get(_int(handle))
+
+    def default_channel(self) -> int:
+        return next(iter(self.channels))
+
+    def inject(self, can_id: int, data=b"", msgtype=PCAN_MESSAGE_STANDARD, timestamp_us=None, channel=None) -> bool:
+        """向接收队列注入一帧，被过滤器丢弃或队列已满时返回 False"""
+        ch = self.channels[self.default_channel() if channel is None else _int(channel)]
+        if not ch.initialized or not ch.accepts(can_id):
+            return False
+        if len(ch.queue) >= ch.queue_size:
+            ch.overrun = True
+            ch.receive_event.set()
+            return False
+        data = bytes(data)
+        ch.queue.append((_MSG_STRUCT.pack(can_id, _int(msgtype), len(data), data),
+                         pack_timestamp(now_us() if timestamp_us is None else timestamp_us)))
+        ch.receive_event.set()
+        return True
+
+    def inject_many(self, frames, channel=None) -> int:
+        """注入多帧 (can_id, data) 或 (can_id, data, timestamp_us)，返回进入队列的帧数"""
+        count = 0
+        for frame in frames:
+            if self.inject(frame[0], frame[1], timestamp_us=frame[2] if len(frame) > 2 else None, channel=channel):
+                count += 1
+        return count
+
+    def inject_frames(self, frames, channel=None) -> int:
+        """
+        注入 FRAME_DTYPE 数组（回放记录），保留原时间戳，返回进入队列的帧数
+
+        被过滤器丢弃的帧不计入；队列剩余空间不足时只注入能放下的部分并置溢出标志
+        """
+        ch = self.channels[self.default_channel() if channel is None else _int(channel)]
+        if not ch.initialized or len(frames) == 0:
+            return 0
+        if ch.filter_mode == PCAN_FILTER_CLOSE:
+            return 0
+        if ch.filter_mode != PCAN_FILTER_OPEN:
+            ids = frames["id"]
+            accepted = np.zeros(len(frames), dtype=bool)
+            for from_id, to_id in ch.filter_ranges:
+                accepted |= (ids >= from_id) & (ids <= to_id)
+            frames = frames[accepted]
+        space = ch.queue_size - len(ch.queue)
+        if len(frames) > space:
+            ch.overrun = True
+            frames = frames[:max(space, 0)]
+        count = len(frames)
+        if count == 0:
+            ch.receive_event.set()
+            return 0
+
+        msgs = np.zeros(count, dtype=PCAN_MSG_DTYPE)
+        msgs["ID"] = frames["id"]
+        msgs["MSGTYPE"] = frames["msgtype"]
+        msgs["LEN"] = frames["len"]
+        msgs["DATA"] = frames["data"]
+        millis, micros = np.divmod(frames["timestamp"], np.uint64(1000))
+        timestamps = np.zeros(count, dtype=PCAN_TIMESTAMP_DTYPE)
+        timestamps["millis"] = millis & np.uint64(0xFFFFFFFF)
+        timestamps["millis_overflow"] = (millis >> np.uint64(32)) & np.uint64(0xFFFF)
+        timestamps["micros"] = micros
+        msg_bytes, ts_bytes = msgs.tobytes(), timestamps.tobytes()
+        ch.queue.extend(zip([msg_bytes[i:i + _MSG_SIZE] for i in range(0, count * _MSG_SIZE, _MSG_SIZE)],
+                            [ts_bytes[i:i + _TIMESTAMP_SIZE] for i in range(0, count * _TIMESTAMP_SIZE, _TIMESTAMP_SIZE)]))
+        ch.receive_event.set()
+        return count
+
+    def free(self, channel=None) -> int:
+        """接收队列剩余空间"""
+        ch = self.channels[self.default_channel() if channel is None else _int(channel)]
+        return ch.queue_size - len(ch.queue)
+
+    def start_stream(self, frames, rate_hz: float, channel=None):
+        """以 rate_hz 帧/秒的速率从迭代器 frames 注入 (can_id, data)"""
+        stream = FrameStream(self, frames, rate_hz, channel)
+        self.streams.append(stream)
+        stream.start()
+        return stream
+
+    def stop_streams(self, channel=None):
+        for stream in list(self.streams):
+            if channel is None or stream.channel == _int(channel):
+                stream.stop()
+                self.streams.remove(stream)
+
+    def pending(self, channel=None) -> int:
+        ch = self.channels[self.default_channel() if channel is None else _int(channel)]
+        return len(ch.queue)
+
+
+class FrameStream(threading.Thread):
+    """按目标速率向虚拟总线注入帧的后台线程"""
+    tick = 0.002
+
+    def __init__(self, bus: VirtualBus, frames, rate_hz: float, channel=None):
+        super().__init__(daemon=True)
+        self.bus = bus
+        self.frames = iter(frames)
+        self.rate_hz = rate_hz
+        self.channel = bus.default_channel() if channel is None else _int(channel)
+        self.sent = 0
+        self.dropped = 0
+        self._start_time = 0.0
+        self._stop_event = threading.Event()
+
+    @property
+    def achieved_rate(self) -> float:
+        elapsed = time.perf_counter() - self._start_time
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    def run(self):
+        self._start_time = time.perf_counter()
+        inject = self.bus.inject
+        while not self._stop_event.wait(self.tick):
+            due = int((time.perf_counter() - self._start_time) * self.rate_hz) - self.sent - self.dropped
+            for _ in range(due):
+                try:
+                    can_id, data = next(self.frames)
+                except StopIteration:
+                    return
+                if inject(can_id, data, channel=self.channel):
+                    self.sent += 1
+                else:
+                    self.dropped += 1
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+
+def default_ad_value(can_id, n):
+    """缓慢变化的三角波"""
+    return 100000 + can_id * 1000 + abs(n % 2000 - 1000)
+
+
+class VirtualSensor:
+    """
+    响应上位机指令的虚拟压力传感器
+
+    接收 0x300 | CanId（或广播 0x3FF）的指令帧；收到 Cal 帧时按 protocol.is_cal_ack 的约定
+    从 0x700 | CanId 回送确认，drop_rate 为模拟丢失 Cal 帧（不保存、不确认）的概率。
+    """
+
+    def __init__(self, bus: VirtualBus, can_id: int, channel=None, ack=True, drop_rate=0.0, ad_value=None):
+        self.bus = bus
+        self.can_id = can_id
+        self.channel = bus.default_channel() if channel is None else _int(channel)
+        self.ack = ack
+        self.drop_rate = drop_rate
+        self.ad_value = ad_value or default_ad_value
+        self.mode = 1  # Switch：0 上报物理值，1 上报 AD 值
+        self.interval_ms = 10
+        self.cal_points = {}  # 序号 -> (adValue, rangeValue)
+        self.cal_table = []  # Switch 0x02 保存后的标定表
+        self.saved = False
+        self.commands = []  # 收到的全部指令 data
+
+    def on_write(self, channel, frame_id, msgtype, data):
+        target = frame_id & 0xFF
+        if channel != self.channel or frame_id & 0x700 != 0x300 or target not in (self.can_id, 0xFF) or not data:
+            return
+        self.commands.append(data)
+        command = data[0]
+        if command == Command.Cal and len(data) == 8:
+            if self.drop_rate and random.random() < self.drop_rate:
+                return
+            self.cal_points[data[1]] = (int.from_bytes(data[2:6], "little"), int.from_bytes(data[6:8], "little"))
+            if self.ack:
+                self.bus.inject(0x700 | self.can_id, data, channel=self.channel)
+        elif command == Command.Switch and len(data) > 1:
+            if data[1] == 0x02:
+                self.cal_table = [self.cal_points[i] for i in sorted(self.cal_points)]
+            else:
+                self.mode = data[1]
+        elif command == Command.Freq and len(data) > 1:
+            self.interval_ms = data[1]
+        elif command == Command.ID and len(data) > 1:
+            self.can_id = data[1]
+        elif command == Command.Save:
+            self.saved = True
+        elif command == Command.Reset:
+            self.cal_points.clear()
+            self.cal_table = []
+
+    def report(self, n: int):
+        """第 n 次上报帧 (can_id, data)"""
+        value = self.ad_value(self.can_id, n)
+        if self.mode == 0:
+            return 0x700 | self.can_id, (value & 0x1FFF).to_bytes(2, "little")
+        return 0x700 | self.can_id, (value & 0xFFFFFFFF).to_bytes(4, "little")
+
+
+def attach_sensors(bus: VirtualBus, can_ids, channel=None, **kwargs):
+    """在总线上挂接虚拟传感器，返回 VirtualSensor 列表"""
+    sensors = [VirtualSensor(bus, can_id, channel, **kwargs) for can_id in can_ids]
+    bus.write_hooks.extend(sensor.on_write for sensor in sensors)
+    return sensors
+
+
+def sensor_report_frames(sensors, ad_value=None):
+    """
+    传感器上报帧生成器，按顺序轮询
+
+    sensors 为 VirtualSensor 或 CanId；CanId 使用 ad_value(can_id, n) 生成 AD 值上报，默认为三角波
+    """
+    sensors = list(sensors)
+    ad_value = ad_value or default_ad_value
+    n = 0
+    while True:
+        for sensor in sensors:
+            if isinstance(sensor, VirtualSensor):
+                yield sensor.report(n)
+            else:
+                yield 0x700 | (sensor & 0xFF), (ad_value(sensor, n) & 0xFFFFFFFF).to_bytes(4, "little")
+        n += 1
+
+
+def parse_id_list(text: str):
+    """解析 "1-16,20,30" 形式的 id 列表"""
+    ids = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ids.extend(range(int(start, 0), int(end, 0) + 1))
+        else:
+            ids.append(int(part, 0))
+    return ids
+
+
+_default_bus = None
+
+
+def default_bus() -> VirtualBus:
+    """进程内共享的虚拟总线，PCANBasic(backend="virtual") 默认使用它"""
+    global _default_bus
+    if _default_bus is None:
+        _default_bus = VirtualBus()
+    return _default_bus
+
+
+class VirtualPCANBasic(PCANBasic):
+    """
+      PCAN-Basic API implemented on a VirtualBus
+
+    Remarks:
+      Method signatures and return values follow pCANBasic.PCANBasic.
+      CAN FD is not simulated.
+    """
+
+    def __init__(self, backend=None, bus: VirtualBus = None):
+        self.bus = bus if bus is not None else default_bus()
+
+    def _channel(self, Channel):
+        ch = self.bus.channel(Channel)
+        if ch is None:
+            return None, PCAN_ERROR_ILLHW
+        if not ch.initialized:
+            return None, PCAN_ERROR_INITIALIZE
+        return ch, PCAN_ERROR_OK
+
+    def Initialize(self, Channel, Btr0Btr1, HwType=TPCANType(0), IOPort=c_uint(0), Interrupt=c_ushort(0)):
+        ch = self.bus.channel(Channel)
+        if ch is None:
+            return PCAN_ERROR_ILLHW
+        if ch.initialized:
+            return PCAN_ERROR_HWINUSE
+        ch.reset()
+        ch.filter_mode = PCAN_FILTER_OPEN
+        ch.filter_ranges.clear()
+        ch.bitrate = _int(Btr0Btr1)
+        ch.initialized = True
+
+        sensors = os.environ.get(VIRTUAL_SENSORS_ENV)
+        if sensors:
+            if ch.handle not in self.bus.sensors:
+                self.bus.sensors[ch.handle] = attach_sensors(self.bus, parse_id_list(sensors), ch.handle)
+            rate = float(os.environ.get(VIRTUAL_RATE_ENV, "1000"))
+            self.bus.start_stream(sensor_report_frames(self.bus.sensors[ch.handle]), rate, ch.handle)
+        return PCAN_ERROR_OK
+
+    def InitializeFD(self, Channel, BitrateFD):
+        return PCAN_ERROR_ILLOPERATION
+
+    def Uninitialize(self, Channel):
+        handles = list(self.bus.channels) if _int(Channel) == PCAN_NONEBUS.value else [_int(Channel)]
+        for handle in handles:
+            ch = self.bus.channel(handle)
+            if ch is None:
+                return PCAN_ERROR_ILLHW
+            self.bus.stop_streams(handle)
+            ch.initialized = False
+            ch.reset()
+        return PCAN_ERROR_OK
+
+    def Reset(self, Channel):
+        ch, status = self._channel(Channel)
+        if ch:
+            ch.reset()
+        return status
+
+    def GetStatus(self, Channel):
+        return self._channel(Channel)[1]
+
+    def Read(self, Channel):
+        msg = TPCANMsg()
+        timestamp = TPCANTimestamp()
+        ch, status = self._channel(Channel)
+        if ch is None:
+            return status, msg, timestamp
+        if ch.overrun:
+            ch.overrun = False
+            return PCAN_ERROR_QOVERRUN, msg, timestamp
+        try:
+            msg_raw, timestamp_raw = ch.queue.popleft()
+        except IndexError:
+            ch.queue_empty()
+            return PCAN_ERROR_QRCVEMPTY, msg, timestamp
+        memmove(addressof(msg), msg_raw, _MSG_SIZE)
+        memmove(addressof(timestamp), timestamp_raw, _TIMESTAMP_SIZE)
+        return PCAN_ERROR_OK, msg, timestamp
+
+    def ReadBatch(self, Channel, MaxFrames):
+        msgs, timestamps = self._batch_buffers(MaxFrames)
+        ch, status = self._channel(Channel)
+        if ch is None:
+            return status, 0, msgs, timestamps
+        if ch.overrun:
+            ch.overrun = False
+            return PCAN_ERROR_QOVERRUN, 0, msgs, timestamps
+        popleft = ch.queue.popleft
+        msg_address = addressof(msgs)
+        timestamp_address = addressof(timestamps)
+        count = 0
+        status = PCAN_ERROR_OK
+        while count < MaxFrames:
+            try:
+                msg_raw, timestamp_raw = popleft()
+            except IndexError:
+                ch.queue_empty()
+                status = PCAN_ERROR_QRCVEMPTY
+                break
+            memmove(msg_address + count * _MSG_SIZE, msg_raw, _MSG_SIZE)
+            memmove(timestamp_address + count * _TIMESTAMP_SIZE, timestamp_raw, _TIMESTAMP_SIZE)
+            count += 1
+        return status, count, msgs, timestamps
+
+    def ReadFD(self, Channel):
+        return PCAN_ERROR_ILLOPERATION, TPCANMsgFD(), TPCANTimestampFD()
+
+    def Write(self, Channel, MessageBuffer):
+        ch, status = self._channel(Channel)
+        if ch is None:
+            return status
+        data = bytes(MessageBuffer.DATA)[:MessageBuffer.LEN]
+        for hook in self.bus.write_hooks:
+            hook(ch.handle, MessageBuffer.ID, _int(MessageBuffer.MSGTYPE), data)
+        return PCAN_ERROR_OK
+
+    def WriteFD(self, Channel, MessageBuffer):
+        return PCAN_ERROR_ILLOPERATION
+
+    def FilterMessages(self, Channel, FromID, ToID, Mode):
+        ch, status = self._channel(Channel)
+        if ch is None:
+            return status
+        # 与 PCAN-Basic 一致：OPEN 状态下先关闭再设置，CUSTOM 状态下扩展范围
+        if ch.filter_mode != PCAN_FILTER_CUSTOM:
+            ch.filter_ranges.clear()
+        ch.filter_ranges.append((_int(FromID), _int(ToID)))
+        ch.filter_mode = PCAN_FILTER_CUSTOM
+        return PCAN_ERROR_OK
+
+    def GetValue(self, Channel, Parameter):
+        parameter = _int(Parameter)
+        if parameter == PCAN_ATTACHED_CHANNELS_COUNT.value:
+            return PCAN_ERROR_OK, len(self.bus.channels)
+        if parameter == PCAN_ATTACHED_CHANNELS.value:
+            channels = (TPCANChannelInformation * len(self.bus.channels))()
+            for info, ch in zip(channels, self.bus.channels.values()):
+                info.channel_handle = ch.handle
+                info.device_type = PCAN_USB.value
+                info.device_name = b"PCAN-USB (virtual)"
+                info.channel_condition = PCAN_CHANNEL_OCCUPIED if ch.initialized else PCAN_CHANNEL_AVAILABLE
+            return PCAN_ERROR_OK, channels
+        if parameter == PCAN_API_VERSION.value:
+            return PCAN_ERROR_OK, b"virtual"
+        if parameter == PCAN_CHANNEL_CONDITION.value:
+            ch = self.bus.channel(Channel)
+            if ch is None:
+                return PCAN_ERROR_OK, PCAN_CHANNEL_UNAVAILABLE
+            return PCAN_ERROR_OK, PCAN_CHANNEL_OCCUPIED if ch.initialized else PCAN_CHANNEL_AVAILABLE
+
+        ch, status = self._channel(Channel)
+        if ch is None:
+            return status,
+        if parameter == PCAN_MESSAGE_FILTER.value:
+            return PCAN_ERROR_OK, ch.filter_mode
+        if parameter == PCAN_RECEIVE_EVENT.value:
+            # Linux 驱动返回可 select 的文件描述符，虚拟通道返回等价的 threading.Event
+            return PCAN_ERROR_OK, ch.receive_event
+        if parameter == PCAN_BITRATE_INFO.value:
+            return PCAN_ERROR_OK, ch.bitrate
+        return PCAN_ERROR_ILLPARAMTYPE,
+
+    def SetValue(self, Channel, Parameter, Buffer):
+        parameter = _int(Parameter)
+        ch, status = self._channel(Channel)
+        if ch is None:
+            return status
+        if parameter == PCAN_MESSAGE_FILTER.value:
+            if Buffer not in (PCAN_FILTER_OPEN, PCAN_FILTER_CLOSE):
+                return PCAN_ERROR_ILLPARAMVAL
+            ch.filter_mode = Buffer
+            ch.filter_ranges.clear()
+            return PCAN_ERROR_OK
+        if parameter == PCAN_RECEIVE_EVENT.value:
+            # Windows 风格的事件句柄配置，虚拟通道始终使用自己的事件对象
+            return PCAN_ERROR_OK
+        return PCAN_ERROR_ILLPARAMTYPE
+
+    def GetErrorText(self, Error, Language=0):
+        return PCAN_ERROR_OK, f"Virtual PCAN error ({_int(Error):X}h)".encode()
+
+    def LookUpChannel(self, Parameters):
+        return PCAN_ERROR_OK, TPCANHandle(self.bus.default_channel())
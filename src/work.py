@@ -4,30 +4,83 @@ from PySide6.QtCore import QThread, Signal, QObject
 
 
 class ReadCanMsgWork(QObject):
+    RECEIVE_MODE_EVENT = "event"
+    RECEIVE_MODE_POLLING = "polling"
+
     resultSignal = Signal(object)
     error_signal = Signal(str)
     finishedSignal = Signal()
+    modeSignal = Signal(str, str)  # (接收方式, 回退为轮询的原因)
+
+    event_timeout = 0.05  # 等待接收事件的超时，保证 stop_work 能及时生效
+    poll_interval = 0.01  # 轮询间隔上限，队列持续为空时使用
+    min_poll_interval = 0.001
+    backlog_frames = 128  # 一次读取的帧数超过该值时缩短等待时间
+    busy_frames = 1024  # 一次读取的帧数达到该值时不等待，立即再读
 
-    def __init__(self, func, *args, **kwargs):
+    def __init__(self, func, *args, receive_event=None, fallback_reason="", result_size=None, **kwargs):
+        """
+        result_size(result) 返回一次 func 读取的帧数，给出时按积压调整等待时间
+
+        receive_event 为 None 时轮询，fallback_reason 为无法使用接收事件的原因，随 modeSignal 发出
+        """
         super().__init__()
         self.func = func
         self.args = args
         self.kwargs = kwargs
+        self.receive_event = receive_event
+        self.fallback_reason = fallback_reason
+        self.result_size = result_size
+        self.interval = self.poll_interval
         self._is_running = False
 
+    @property
+    def receive_mode(self):
+        return self.RECEIVE_MODE_POLLING if self.receive_event is None else self.RECEIVE_MODE_EVENT
+
     def start_work(self):
         # print("start work")
         self._is_running = True
+        self.modeSignal.emit(self.receive_mode, self.fallback_reason)
         while self._is_running:
+            if self.receive_event is not None and self.interval > 0:
+                try:
+                    if not self.receive_event.wait(self.event_timeout):
+                        continue
+                except Exception as e:
+                    # 接收事件失效时回退为轮询
+                    self.receive_event = None
+                    self.fallback_reason = str(e)
+                    self.modeSignal.emit(self.receive_mode, self.fallback_reason)
+
             try:
                 result = self.func(*self.args, **self.kwargs)
                 # print(result)
                 self.resultSignal.emit(result)
+                if self.result_size is not None:
+                    self.interval = self.next_interval(self.result_size(result))
             except Exception as e:
                 self.error_signal.emit(str(e))
                 self._is_running = False
 
-            time.sleep(0.01)
+            if self.receive_event is None and self.interval > 0:
+                time.sleep(self.interval)
+        self.finishedSignal.emit()
+
+    def next_interval(self, frames: int) -> float:
+        """
+        下一次读取前的等待时间
+
+        积压达到 busy_frames 时不等待；超过 backlog_frames 时逐次减半到 min_poll_interval，
+        不足 backlog_frames 的四分之一时逐次加倍回到 poll_interval，其余情况保持不变。事件模式下只在不等待时跳过事件。
+        """
+        if frames >= self.busy_frames:
+            return 0.0
+        if frames > self.backlog_frames:
+            return max(self.interval / 2, self.min_poll_interval)
+        if frames < self.backlog_frames // 4:
+            return min(max(self.interval * 2, self.min_poll_interval), self.poll_interval)
+        return self.interval
 
     def stop_work(self):
-        self._is_running = False
\ No newline at end of file
+        self._is_running = False